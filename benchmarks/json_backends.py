@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of ``json_stringify`` against the encoder it replaced, and
+against orjson and msgspec for reference.
+
+    poetry run python benchmarks/json_backends.py
+"""
+
+import dataclasses
+import json
+import timeit
+
+from uploadthing_py.types import File
+from uploadthing_py.utils import _encode_default, json_stringify
+
+
+def legacy_json_stringify(o):
+    # json_stringify before the module level encoder was introduced
+    class EnhancedJSONEncoder(json.JSONEncoder):
+        def default(self, o):
+            if dataclasses.is_dataclass(o):
+                return dataclasses.asdict(o)
+            return super().default(o)
+
+    return json.dumps(o, cls=EnhancedJSONEncoder, separators=(",", ":"))
+
+
+# The prepareUpload payload of the route handler
+PREPARE_UPLOAD = {
+    "files": [
+        {
+            "name": f"vacation-photo-{i}.heic",
+            "size": 4_194_304 + i,
+            "type": "image/heic",
+            "customId": None,
+            "contentDisposition": "inline",
+        }
+        for i in range(20)
+    ],
+    "metadata": {"userId": "user_2fQx9", "tags": ["été", "plage"], "public": False},
+    "callbackUrl": "https://example.com/api/uploadthing",
+    "callbackSlug": "videoAndImage",
+}
+
+SERVER_CALLBACK = {"fileKey": "abc-vacation-photo.heic", "callbackData": None}
+
+LIST_FILES = {
+    "files": [
+        File(id=str(i), custom_id=None, key=f"key-{i}", name="a.png", status="Uploaded")
+        for i in range(20)
+    ],
+}
+
+
+def backends():
+    yield "legacy json", legacy_json_stringify
+    yield "json_stringify", json_stringify
+    # Not used by json_stringify, they format non-ASCII text and floats
+    # differently from the standard library
+    try:
+        import orjson
+
+        yield "orjson", lambda o: orjson.dumps(o, default=_encode_default)
+    except ImportError:
+        pass
+    try:
+        import msgspec
+
+        yield "msgspec", msgspec.json.Encoder(enc_hook=_encode_default).encode
+    except ImportError:
+        pass
+
+
+def main(number: int = 20_000):
+    payloads = [
+        ("prepareUpload", PREPARE_UPLOAD),
+        ("serverCallback", SERVER_CALLBACK),
+        ("dataclasses", LIST_FILES),
+    ]
+    for label, payload in payloads:
+        print(f"{label} payload:")
+        expected = legacy_json_stringify(payload).encode()
+        for name, dumps in backends():
+            seconds = min(
+                timeit.repeat(lambda: dumps(payload), number=number, repeat=5)
+            )
+            output = dumps(payload)
+            output = output if isinstance(output, bytes) else output.encode()
+            print(
+                f"{name:>16}: {seconds / number * 1e6:8.2f} µs/call"
+                f"  byte-identical: {output == expected!s:>5}"
+                f"  equivalent: {json.loads(output) == json.loads(expected)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
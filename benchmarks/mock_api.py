@@ -0,0 +1,161 @@
+"""
+Latency percentiles and throughput of UTApi calls, bulk operations and full
+route handler cycles (upload -> presigned PUT -> callback -> serverCallback)
+against the in-process ``MockUploadThingAPI``, so no network or API key is
+needed. Use ``--latency`` and ``--error-rate`` to simulate a slow or flaky API.
+
+    poetry run python benchmarks/mock_api.py --concurrency 32 --latency 0.01
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from uploadthing_py import (
+    RetryPolicy,
+    UTApi,
+    UploadFiles,
+    create_asgi_app,
+    create_uploadthing,
+)
+from uploadthing_py.testing import MockUploadThingAPI
+from uploadthing_py.utils import json_stringify, sign_payload
+
+API_KEY = "sk_benchmark"
+
+
+async def measure(name: str, operation, requests: int, concurrency: int):
+    in_flight = asyncio.Semaphore(concurrency)
+    durations = []
+    errors = 0
+
+    async def run():
+        nonlocal errors
+        async with in_flight:
+            started = time.perf_counter()
+            try:
+                await operation()
+            except Exception:
+                # Presigned uploads aren't retried, so injected errors can fail them
+                errors += 1
+                return
+            durations.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[run() for _ in range(requests)])
+    elapsed = time.perf_counter() - started
+
+    p50, p95, p99 = (
+        statistics.quantiles(durations, n=100)[index] * 1000 for index in (49, 94, 98)
+    )
+    print(
+        f"{name:>22}: p50 {p50:7.2f} ms  p95 {p95:7.2f} ms  p99 {p99:7.2f} ms"
+        f"  {requests / elapsed:8.0f} ops/s  {errors} errors"
+    )
+
+
+def route_handler_cycle(api: MockUploadThingAPI):
+    f = create_uploadthing()
+    router = {
+        "images": f({"image": {"max_file_size": "4MB"}})
+        .middleware(lambda request: {"user_id": "1"})
+        .on_upload_complete(lambda file, metadata: {"by": metadata["user_id"]})
+    }
+    app = create_asgi_app(
+        router,
+        API_KEY,
+        False,
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+    )
+    client = httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    )
+    storage = httpx.AsyncClient(transport=httpx.ASGITransport(api))
+    data = b"x" * 1024
+
+    async def cycle():
+        response = await client.post(
+            "/api/uploadthing?slug=images&actionType=upload",
+            json={"files": [{"name": "a.png", "size": len(data), "type": "image/png"}]},
+        )
+        (presigned,) = response.json()
+        await storage.put(presigned["url"], content=data)
+
+        payload = json_stringify(
+            {
+                "status": "uploaded",
+                "metadata": {"user_id": "1"},
+                "file": {
+                    "name": "a.png",
+                    "size": len(data),
+                    "type": "image/png",
+                    "key": presigned["key"],
+                    "url": presigned["fileUrl"],
+                },
+            }
+        )
+        await client.post(
+            "/api/uploadthing?slug=images",
+            content=payload,
+            headers={
+                "uploadthing-hook": "callback",
+                "x-uploadthing-signature": sign_payload(payload, API_KEY),
+            },
+        )
+
+    async def close():
+        await client.aclose()
+        await storage.aclose()
+        await app.close()
+
+    return cycle, close
+
+
+async def main(requests: int, concurrency: int, latency: float, error_rate: float):
+    api = MockUploadThingAPI(latency=latency, jitter=latency / 2, error_rate=error_rate)
+    async with UTApi(
+        API_KEY,
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+        retry_policy=RetryPolicy(base_delay=0.01),
+    ) as utapi:
+        data = b"x" * 64 * 1024
+        await measure(
+            "upload_files (64 KiB)",
+            lambda: utapi.upload_files(UploadFiles.FileEsque("file.bin", data)),
+            requests,
+            concurrency,
+        )
+        await measure("list_files", utapi.list_files, requests, concurrency)
+        await measure("get_usage_info", utapi.get_usage_info, requests, concurrency)
+        await measure(
+            "get_signed_url",
+            lambda: utapi.get_signed_url("file.bin"),
+            requests,
+            concurrency,
+        )
+        keys = [f"key-{i}" for i in range(5000)]
+        await measure(
+            "bulk_delete (5000)",
+            lambda: utapi.bulk_delete_files(keys, bulk_options={"batch_size": 500}),
+            max(requests // 100, 5),
+            1,
+        )
+
+    cycle, close = route_handler_cycle(api)
+    await measure("route handler cycle", cycle, requests, concurrency)
+    await close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.latency, args.error_rate))
@@ -0,0 +1,64 @@
+"""
+Per-request validation cost of trying every member of ``UploadThingRequestBody``
+versus the adapter selected by the hook header / action type.
+
+    poetry run python benchmarks/request_parsing.py
+"""
+
+import json
+import timeit
+
+from pydantic import TypeAdapter
+
+from uploadthing_py.types import UploadThingRequestBody, parse_request_body
+
+BODIES = {
+    (None, "upload"): {
+        "files": [
+            {"name": f"photo-{i}.png", "size": 1024 * i, "type": "image/png"}
+            for i in range(5)
+        ]
+    },
+    ("callback", None): {
+        "status": "uploaded",
+        "metadata": {"userId": "user_2fQx9"},
+        "file": {
+            "name": "photo.png",
+            "size": 1024,
+            "type": "image/png",
+            "key": "key",
+            "url": "https://utfs.io/f/key",
+        },
+    },
+    (None, "multipart-complete"): {
+        "fileKey": "key",
+        "uploadId": "upload",
+        "etags": [{"tag": f"etag-{i}", "partNumber": i} for i in range(1, 9)],
+    },
+    (None, "failure"): {"fileKey": "key", "fileName": "photo.png"},
+}
+
+union = TypeAdapter(UploadThingRequestBody)
+
+
+def main(number: int = 50_000):
+    for (hook, action_type), body in BODIES.items():
+        raw = json.dumps(body).encode()
+        before = min(
+            timeit.repeat(lambda: union.validate_json(raw), number=number, repeat=5)
+        )
+        after = min(
+            timeit.repeat(
+                lambda: parse_request_body(raw, hook, action_type),
+                number=number,
+                repeat=5,
+            )
+        )
+        print(
+            f"{hook or action_type:>18}: union {before / number * 1e6:6.2f} µs"
+            f"  keyed {after / number * 1e6:6.2f} µs"
+        )
+
+
+if __name__ == "__main__":
+    main()
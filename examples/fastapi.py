@@ -1,6 +1,5 @@
 from fastapi import FastAPI, Request, Response
 from uploadthing_py import (
-    UploadThingRequestBody,
     create_uploadthing,
     create_route_handler,
 )
@@ -8,14 +7,6 @@ from fastapi.middleware.cors import CORSMiddleware
 import os
 
 
-app = FastAPI()
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
-
 f = create_uploadthing()
 
 
@@ -45,6 +36,14 @@ handlers = create_route_handler(
     is_dev=os.getenv("ENVIRONMENT", "development") == "development",
 )
 
+app = FastAPI(lifespan=handlers["lifespan"])
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
 
 @app.get("/api")
 async def greeting():
@@ -52,18 +51,11 @@ async def greeting():
 
 
 @app.get("/api/uploadthing")
-async def ut_get():
-    return handlers["GET"]()
+async def ut_get(request: Request):
+    return handlers["GET"](request)
 
 
 @app.post("/api/uploadthing")
-async def ut_post(
-    request: Request,
-    response: Response,
-    body: UploadThingRequestBody,
-):
-    return await handlers["POST"](
-        request=request,
-        response=response,
-        body=body,
-    )
+async def ut_post(request: Request, response: Response):
+    # The body is parsed by the handler, once it knows which request type it is
+    return await handlers["POST"](request=request, response=response)
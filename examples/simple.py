@@ -5,23 +5,23 @@ Simple example of using the library.
 import asyncio
 import os
 
-from uploadthing_py import UTApi
+from uploadthing_py import UTApi, UploadFiles
 
 
 async def main():
-    utapi = UTApi(os.environ["UTAPI_KEY"])
-
-    # List the files in your app
-    res = await utapi.list_files()
-    print("List files:", res)
-
-    # Delete the first file from the list
-    key = res[0].key
-    res = await utapi.delete_file(key)
-    print("Delete file:", res)
-
-    # (TODO) Create a new file
-    # res = await utapi.upload_files()
+    async with UTApi(os.environ["UTAPI_KEY"]) as utapi:
+        # List the files in your app
+        res = await utapi.list_files()
+        print("List files:", res)
+
+        # Delete the first file from the list
+        key = res[0].key
+        res = await utapi.delete_file(key)
+        print("Delete file:", res)
+
+        # Upload a new file, large files are streamed in concurrent chunks
+        res = await utapi.upload_files(UploadFiles.FileEsque("hello.txt", b"Hello!"))
+        print("Upload file:", res)
 
 
 if __name__ == "__main__":
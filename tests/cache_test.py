@@ -0,0 +1,139 @@
+import asyncio
+import time
+
+import pytest
+from uploadthing_py import GetUsageInfo
+from uploadthing_py.cache import (
+    MemoryCacheBackend,
+    SignedUrlCache,
+    UsageInfoCache,
+    url_expiry,
+)
+
+
+def make_fetch(url="https://utfs.io/f/abc"):
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0)
+        return url
+
+    return fetch, calls
+
+
+class TestSignedUrlCache:
+    @pytest.mark.asyncio
+    async def test_reuses_url_until_margin(self):
+        cache = SignedUrlCache(margin=60)
+        fetch, calls = make_fetch()
+        assert (
+            await cache.get("abc", "file_key", 3600, fetch) == "https://utfs.io/f/abc"
+        )
+        await cache.get("abc", "file_key", 3600, fetch)
+        assert len(calls) == 1
+
+        # Too close to expiry to be worth caching
+        await cache.get("abc", "file_key", 30, fetch)
+        await cache.get("abc", "file_key", 30, fetch)
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_uses_the_given_backend(self):
+        backend = MemoryCacheBackend(maxsize=8)
+        cache = SignedUrlCache(backend)
+        fetch, _ = make_fetch()
+        await cache.get("abc", "file_key", 3600, fetch)
+        assert len(backend) == 1
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_share_a_request(self):
+        cache = SignedUrlCache()
+        fetch, calls = make_fetch()
+        urls = await asyncio.gather(
+            *[cache.get("abc", "file_key", None, fetch) for _ in range(10)]
+        )
+        assert len(set(urls)) == 1
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_errors_are_not_cached(self):
+        cache = SignedUrlCache()
+
+        async def fail():
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            await cache.get("abc", "file_key", None, fail)
+        fetch, calls = make_fetch()
+        await cache.get("abc", "file_key", None, fetch)
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_uses_expiry_from_url(self):
+        expires = int((time.time() + 30) * 1000)
+        cache = SignedUrlCache(margin=60)
+        fetch, calls = make_fetch(f"https://utfs.io/f/abc?expires={expires}")
+        await cache.get("abc", "file_key", 3600, fetch)
+        await cache.get("abc", "file_key", 3600, fetch)
+        assert len(calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(maxsize=2)
+    expires_at = time.time() + 60
+    await backend.set("a", "1", expires_at)
+    await backend.set("b", "2", expires_at)
+    await backend.get("a")
+    await backend.set("c", "3", expires_at)
+    assert await backend.get("b") is None
+    assert await backend.get("a") == ("1", expires_at)
+    assert len(backend) == 2
+
+
+def test_url_expiry():
+    assert url_expiry("https://utfs.io/f/abc?expires=1700000000000") == 1700000000
+    assert url_expiry("https://utfs.io/f/abc?expires=1700000000") == 1700000000
+    assert url_expiry("https://utfs.io/f/abc") is None
+
+
+class TestUsageInfoCache:
+    @staticmethod
+    def make_fetch():
+        calls = []
+
+        async def fetch():
+            calls.append(1)
+            await asyncio.sleep(0)
+            return GetUsageInfo.GetUsageInfoResponse(
+                total_bytes=100, app_total_bytes=50, files_uploaded=2, limit_bytes=1000
+            )
+
+        return fetch, calls
+
+    @pytest.mark.asyncio
+    async def test_concurrent_callers_share_a_refresh(self):
+        cache = UsageInfoCache(ttl=60)
+        fetch, calls = self.make_fetch()
+        await asyncio.gather(*[cache.get(fetch) for _ in range(10)])
+        await cache.get(fetch)
+        assert len(calls) == 1
+
+        cache.invalidate()
+        await cache.get(fetch)
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_records_uploads_until_refresh(self):
+        cache = UsageInfoCache(ttl=60)
+        fetch, _ = self.make_fetch()
+        await cache.get(fetch)
+        cache.record_upload(25, files=2)
+        usage = await cache.get(fetch)
+        assert usage.total_bytes == 125
+        assert usage.app_total_bytes == 75
+        assert usage.files_uploaded == 4
+
+        cache.invalidate()
+        assert (await cache.get(fetch)).files_uploaded == 2
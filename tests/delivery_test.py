@@ -0,0 +1,96 @@
+import time
+
+import httpx
+import pytest
+from uploadthing_py import RetryPolicy
+from uploadthing_py.client import SharedClient
+from uploadthing_py.delivery import ServerCallbackQueue
+from uploadthing_py.testing import MockUploadThingAPI
+from uploadthing_py.utils import json_stringify
+
+
+def make_queue(transport: httpx.AsyncBaseTransport, **options) -> ServerCallbackQueue:
+    return ServerCallbackQueue(
+        http=SharedClient(transport=transport),
+        api_key="sk_test",
+        retry_policy=RetryPolicy(base_delay=0, max_attempts=2),
+        base_url=MockUploadThingAPI().base_url,
+        **options,
+    )
+
+
+def payload(key: str) -> bytes:
+    return json_stringify({"fileKey": key, "callbackData": {"ok": True}})
+
+
+@pytest.mark.asyncio
+async def test_delivers_and_counts():
+    api = MockUploadThingAPI()
+    queue = make_queue(httpx.ASGITransport(api))
+    for key in ("a", "b", "c"):
+        await queue.put(payload(key))
+    await queue.drain()
+
+    metrics = queue.metrics
+    assert (metrics.enqueued, metrics.delivered, metrics.failed) == (3, 3, 0)
+    assert metrics.attempts == 3
+    assert metrics.pending == 0
+    assert api.requests["/v6/serverCallback"] == 3
+
+
+@pytest.mark.asyncio
+async def test_counts_failed_deliveries_after_retries():
+    api = MockUploadThingAPI(error_rate=1.0)
+    queue = make_queue(httpx.ASGITransport(api))
+    await queue.put(payload("a"))
+    await queue.drain()
+
+    assert queue.metrics.failed == 1
+    assert queue.metrics.attempts == 2
+
+
+@pytest.mark.asyncio
+async def test_workers_survive_unexpected_errors():
+    calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        if calls <= 2:
+            raise httpx.DecodingError("malformed response", request=request)
+        return httpx.Response(200, json={"status": "ok"})
+
+    queue = make_queue(httpx.MockTransport(handler), workers=1)
+    for key in ("a", "b", "c"):
+        await queue.put(payload(key))
+    await queue.drain(timeout=1)
+
+    assert queue.metrics.failed == 2
+    assert queue.metrics.delivered == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_waits_for_queued_payloads():
+    api = MockUploadThingAPI(latency=0.01)
+    queue = make_queue(httpx.ASGITransport(api), workers=2)
+    for key in range(6):
+        await queue.put(payload(str(key)))
+    assert queue.metrics.pending > 0
+
+    await queue.drain()
+    assert queue.metrics.delivered == 6
+    assert queue.metrics.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_drain_gives_up_after_the_timeout():
+    api = MockUploadThingAPI(latency=1.0)
+    queue = make_queue(httpx.ASGITransport(api), workers=1)
+    for key in ("a", "b"):
+        await queue.put(payload(key))
+
+    started = time.perf_counter()
+    await queue.drain(timeout=0.05)
+    assert time.perf_counter() - started < 0.5
+    assert queue.metrics.delivered == 0
+    assert queue.metrics.pending == 1
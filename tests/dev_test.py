@@ -0,0 +1,184 @@
+import asyncio
+
+import httpx
+import pytest
+from uploadthing_py.client import SharedClient
+from uploadthing_py.dev import DevPoller
+from uploadthing_py.sessions import UploadSessionStore
+from uploadthing_py.testing import MockUploadThingAPI
+
+
+class Environment:
+    """The mock API plus a local server at http://app receiving dev callbacks"""
+
+    def __init__(
+        self,
+        api: MockUploadThingAPI,
+        failing_polls: tuple[str, ...] = (),
+        callback_delay: float = 0.0,
+    ):
+        self.api = api
+        self.failing_polls = failing_polls
+        self.callback_delay = callback_delay
+        self.callbacks: list[bytes] = []
+        self.http = SharedClient(transport=httpx.ASGITransport(self))
+
+    async def __call__(self, scope, receive, send):
+        if dict(scope["headers"])[b"host"] == b"app":
+            body = (await receive())["body"]
+            if b"slow" in body:
+                await asyncio.sleep(self.callback_delay)
+            self.callbacks.append(body)
+            await _respond(send, 200, b'{"success": true}')
+        elif scope["path"].endswith(self.failing_polls):
+            await _respond(send, 503, b'{"error": "Service unavailable"}')
+        else:
+            await self.api(scope, receive, send)
+
+    async def prepare(self, *names: str) -> list[dict]:
+        response = await self.http.get().post(
+            f"{self.api.base_url}/v7/prepareUpload",
+            json={
+                "files": [
+                    {"name": name, "size": 3, "type": "text/plain"} for name in names
+                ],
+                "callbackUrl": "http://app/api/uploadthing",
+                "callbackSlug": "files",
+            },
+        )
+        return response.json()["data"]
+
+    async def upload(self, presigned: dict):
+        await self.http.get().put(presigned["url"], content=b"abc")
+
+
+@pytest.mark.asyncio
+async def test_backoff_is_capped():
+    env = Environment(MockUploadThingAPI())
+    poller = DevPoller(env.http, "sk_test", interval=0.005, max_interval=0.02)
+    (presigned,) = await env.prepare("a.txt")
+    poller.track(presigned)
+
+    await asyncio.sleep(0.15)
+    assert poller._pending[presigned["pollingUrl"]].delay == 0.02
+    assert 5 <= env.api.requests["/v6/pollUpload"] < 15
+    await poller.aclose()
+    await env.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_the_timeout():
+    env = Environment(MockUploadThingAPI())
+    poller = DevPoller(env.http, "sk_test", interval=0.005, timeout=0.03)
+    (presigned,) = await env.prepare("a.txt")
+    poller.track(presigned)
+    task = poller._task
+
+    await asyncio.sleep(0.1)
+    assert poller.pending == 0
+    assert task.done()
+    assert env.callbacks == []
+    await env.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_aclose_cancels_polling():
+    env = Environment(MockUploadThingAPI())
+    poller = DevPoller(env.http, "sk_test", interval=0.005)
+    (presigned,) = await env.prepare("a.txt")
+    poller.track(presigned)
+    task = poller._task
+
+    await asyncio.sleep(0.02)
+    await poller.aclose()
+    assert task.cancelled()
+    assert poller.pending == 0
+    await env.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_error_responses_dont_stop_other_uploads():
+    env = Environment(MockUploadThingAPI(), failing_polls=("a.txt",))
+    poller = DevPoller(env.http, "sk_test", interval=0.005, max_interval=0.01)
+    uploads = await env.prepare("a.txt", "b.txt", "c.txt")
+    for presigned in uploads:
+        await env.upload(presigned)
+        poller.track(presigned)
+
+    await asyncio.sleep(0.05)
+    # b.txt and c.txt are called back, a.txt is still polled
+    assert len(env.callbacks) == 2
+    assert poller.pending == 1
+    assert not poller._task.done()
+    await poller.aclose()
+    await env.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_slow_callbacks_dont_hold_up_polling():
+    env = Environment(MockUploadThingAPI(), callback_delay=10)
+    poller = DevPoller(env.http, "sk_test", interval=0.005, max_interval=0.01)
+    slow, fast = await env.prepare("slow.txt", "fast.txt")
+    await env.upload(slow)
+    poller.track(slow)
+    poller.track(fast)
+
+    await asyncio.sleep(0.03)
+    await env.upload(fast)
+    await asyncio.sleep(0.05)
+    # The callback for slow.txt is still running
+    assert len(env.callbacks) == 1
+    assert b"fast.txt" in env.callbacks[0]
+    assert poller.pending == 0
+
+    await poller.aclose()
+    assert poller._callbacks == set()
+    await env.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_track_cuts_the_backoff_short():
+    env = Environment(MockUploadThingAPI())
+    poller = DevPoller(env.http, "sk_test", interval=0.005, max_interval=5)
+    waiting, new = await env.prepare("waiting.txt", "new.txt")
+    poller.track(waiting)
+
+    # waiting.txt backs off to sleeps longer than the rest of the test
+    await asyncio.sleep(0.4)
+    await env.upload(new)
+    poller.track(new)
+    await asyncio.sleep(0.05)
+    assert len(env.callbacks) == 1
+    assert b"new.txt" in env.callbacks[0]
+    assert poller.pending == 1
+
+    await poller.aclose()
+    await env.http.aclose()
+
+
+@pytest.mark.asyncio
+async def test_uploads_called_back_by_the_webhook_are_skipped():
+    env = Environment(MockUploadThingAPI())
+    sessions = UploadSessionStore()
+    poller = DevPoller(env.http, "sk_test", interval=0.005, sessions=sessions)
+    webhook, polled = await env.prepare("webhook.txt", "polled.txt")
+    for presigned in (webhook, polled):
+        await sessions.record_upload("files", presigned)
+        await env.upload(presigned)
+        poller.track(presigned)
+    # The real webhook for webhook.txt reached the route handler first
+    await sessions.record_callback(webhook["key"])
+
+    await asyncio.sleep(0.05)
+    assert len(env.callbacks) == 1
+    assert b"polled.txt" in env.callbacks[0]
+    assert poller.pending == 0
+    assert env.api.requests["/v6/pollUpload"] == 1
+
+    await poller.aclose()
+    await env.http.aclose()
+
+
+async def _respond(send, status: int, body: bytes):
+    await send({"type": "http.response.start", "status": status})
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,40 @@
+import logging
+
+import pytest
+from uploadthing_py import Instrumentation
+
+
+class TestInstrumentation:
+    def test_reports_phase_with_status(self):
+        events = []
+        instrumentation = Instrumentation(hooks=[events.append])
+        with instrumentation.phase("prepare_upload", slug="img") as span:
+            span.status_code = 502
+
+        (event,) = events
+        assert event.phase == "prepare_upload"
+        assert event.status == "502"
+        assert not event.ok
+        assert event.attributes == {"slug": "img"}
+        assert event.duration >= 0
+
+    def test_reports_errors_and_reraises(self, caplog):
+        events = []
+        instrumentation = Instrumentation(hooks=[events.append])
+        with caplog.at_level(logging.WARNING, logger="uploadthing_py"):
+            with pytest.raises(RuntimeError):
+                with instrumentation.phase("middleware"):
+                    raise RuntimeError("Unauthorized")
+
+        assert events[0].status == "error"
+        assert "middleware failed" in caplog.text
+
+    def test_failing_hook_does_not_break_the_phase(self):
+        def hook(event):
+            raise ValueError("broken exporter")
+
+        events = []
+        instrumentation = Instrumentation(hooks=[hook, events.append])
+        with instrumentation.phase("verify_signature"):
+            pass
+        assert len(events) == 1
@@ -0,0 +1,159 @@
+import io
+import time
+
+import httpx
+import pytest
+from uploadthing_py import UTApi, UploadFiles
+from uploadthing_py.journal import PRESIGNED_URL_MAX_AGE, UploadJournal, fingerprint
+from uploadthing_py.testing import MockUploadThingAPI
+
+
+@pytest.mark.asyncio
+async def test_journal_ignores_torn_lines_and_other_files(tmp_path):
+    journal = UploadJournal.for_file(tmp_path, "a.bin", 30, fingerprint="sha256:a")
+    await journal.start({"key": "abc", "urls": ["u1", "u2", "u3"]}, "a.bin", 30)
+    await journal.record_part(2, "etag-2")
+    with journal.path.open("a") as file:
+        file.write('{"part": 1, "et')
+
+    resumed = UploadJournal(journal.path, "sha256:a")
+    assert await resumed.load("a.bin", 30)
+    assert resumed.presigned["key"] == "abc"
+    assert resumed.parts == {2: "etag-2"}
+    assert not await resumed.load("b.bin", 30)
+    assert not await UploadJournal(journal.path, "sha256:b").load("a.bin", 30)
+
+
+@pytest.mark.asyncio
+async def test_discards_expired_journals(tmp_path, monkeypatch):
+    journal = UploadJournal(tmp_path / "a.jsonl")
+    await journal.start({"key": "abc", "urls": ["u1", "u2"]}, "a.bin", 20)
+
+    later = time.time() + PRESIGNED_URL_MAX_AGE + 1
+    monkeypatch.setattr(time, "time", lambda: later)
+    assert not await journal.load("a.bin", 20)
+    assert not journal.path.exists()
+    assert journal.discarded["key"] == "abc"
+
+
+def test_fingerprints(tmp_path):
+    path = tmp_path / "a.bin"
+    path.write_bytes(b"abc")
+    assert fingerprint(path) == fingerprint(str(path))
+    with path.open("rb") as file:
+        assert fingerprint(file) is not None
+    assert fingerprint(b"abc") == fingerprint(io.BytesIO(b"abc"))
+    assert fingerprint(b"abc") != fingerprint(b"abd")
+    assert fingerprint(iter([b"abc"])) is None
+
+
+@pytest.mark.asyncio
+async def test_resumes_multipart_upload_after_failure(tmp_path):
+    api = MockUploadThingAPI(chunk_size=10)
+    file = UploadFiles.FileEsque("big.bin", bytes(range(95)))
+    options = {"journal_dir": str(tmp_path), "concurrency": 1}
+    # Part 4 fails once, as if the worker lost its connection
+    async with UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(flaky_storage(api, 500, 4)),
+    ) as utapi:
+        with pytest.raises(Exception):
+            await utapi.upload_files(file, options)
+        assert api.requests["/v6/failureCallback"] == 0
+        assert api.requests["/upload"] == 3
+        assert len(list(tmp_path.iterdir())) == 1
+
+        response = await utapi.upload_files(file, options)
+
+    # Parts 4 to 10 are uploaded on the second call, under the same presigned key
+    assert api.requests["/v7/prepareUpload"] == 1
+    assert api.requests["/upload"] == 10
+    assert api.requests["/v6/completeMultipart"] == 1
+    assert api.files[response.key]["status"] == "Uploaded"
+    assert not list(tmp_path.iterdir())
+
+
+def flaky_storage(api: MockUploadThingAPI, status: int, part: int):
+    """Answers the first PUT of ``part`` with ``status`` instead of the mock API"""
+    failed = False
+
+    async def app(scope, receive, send):
+        nonlocal failed
+        query = f"partNumber={part}".encode()
+        if scope["type"] == "http" and scope["query_string"] == query and not failed:
+            failed = True
+            await send({"type": "http.response.start", "status": status})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await api(scope, receive, send)
+
+    return app
+
+
+@pytest.mark.asyncio
+async def test_changed_content_is_not_resumed(tmp_path):
+    api = MockUploadThingAPI(chunk_size=10)
+    options = {"journal_dir": str(tmp_path), "concurrency": 1}
+    async with UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(flaky_storage(api, 500, 4)),
+    ) as utapi:
+        with pytest.raises(Exception):
+            await utapi.upload_files(
+                UploadFiles.FileEsque("export.csv", bytes(95)), options
+            )
+        await utapi.upload_files(
+            UploadFiles.FileEsque("export.csv", bytes(range(95))), options
+        )
+
+    # The regenerated export is uploaded from scratch under a new key, the
+    # discarded upload is reported as failed
+    assert api.requests["/v7/prepareUpload"] == 2
+    assert api.requests["/v6/failureCallback"] == 1
+    assert len(api.files) == 1
+    assert api.requests["/upload"] == 3 + 10
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.asyncio
+async def test_rejected_urls_discard_the_journal(tmp_path):
+    api = MockUploadThingAPI(chunk_size=10)
+    options = {"journal_dir": str(tmp_path), "concurrency": 1}
+    async with UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(flaky_storage(api, 403, 2)),
+    ) as utapi:
+        file = UploadFiles.FileEsque("a.bin", bytes(95))
+        with pytest.raises(Exception):
+            await utapi.upload_files(file, options)
+        assert api.requests["/v6/failureCallback"] == 1
+        assert not list(tmp_path.iterdir())
+
+        await utapi.upload_files(file, options)
+    assert api.requests["/v7/prepareUpload"] == 2
+
+
+@pytest.mark.asyncio
+async def test_expired_journal_is_reported_as_failed(tmp_path, monkeypatch):
+    api = MockUploadThingAPI(chunk_size=10)
+    file = UploadFiles.FileEsque("a.bin", bytes(95))
+    options = {"journal_dir": str(tmp_path), "concurrency": 1}
+    async with UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(flaky_storage(api, 500, 4)),
+    ) as utapi:
+        with pytest.raises(Exception):
+            await utapi.upload_files(file, options)
+        (expired_key,) = api.files
+
+        later = time.time() + PRESIGNED_URL_MAX_AGE + 1
+        monkeypatch.setattr(time, "time", lambda: later)
+        response = await utapi.upload_files(file, options)
+
+    assert api.requests["/v6/failureCallback"] == 1
+    assert list(api.files) == [response.key]
+    assert response.key != expired_key
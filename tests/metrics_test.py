@@ -0,0 +1,41 @@
+import httpx
+import pytest
+from uploadthing_py import ClientMetrics, RetryPolicy, UTApi
+from uploadthing_py.metrics import Histogram
+
+
+def test_histogram_quantile():
+    histogram = Histogram(buckets=(0.1, 0.2, float("inf")))
+    for value in (0.05, 0.15, 0.15, 0.15):
+        histogram.observe(value)
+    assert histogram.counts == [1, 3, 0]
+    assert histogram.quantile(0.25) == pytest.approx(0.1)
+    assert histogram.quantile(0.5) == pytest.approx(0.1 + 0.1 / 3)
+
+
+@pytest.mark.asyncio
+async def test_records_requests_and_retries():
+    responses = iter([503, 200])
+
+    def handler(request: httpx.Request):
+        return httpx.Response(next(responses), json={"files": [], "hasMore": False})
+
+    records = []
+    metrics = ClientMetrics(on_request=records.append)
+    async with UTApi(
+        "sk_test",
+        retry_policy=RetryPolicy(base_delay=0),
+        metrics=metrics,
+        transport=httpx.MockTransport(handler),
+    ) as client:
+        await client.list_files()
+
+    (record,) = records
+    assert record.attempts == 2
+    assert metrics.statuses["/v6/listFiles", "200"] == 1
+    assert metrics.retries["/v6/listFiles"] == 1
+    assert metrics.latency["/v6/listFiles"].count == 1
+    assert metrics.bytes_sent == 2 * record.bytes_sent
+    assert metrics.bytes_received == record.bytes_received > 0
+    assert metrics.in_flight == 0
+    assert metrics.max_connections == 100
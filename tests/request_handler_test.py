@@ -0,0 +1,248 @@
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI, Request, Response
+from uploadthing_py import (
+    create_asgi_app,
+    create_route_handler,
+    create_uploadthing,
+)
+from uploadthing_py import asgi as asgi_module
+from uploadthing_py import client as client_module
+from uploadthing_py.request_handler import CompiledRouterConfig, extract_router_config
+from uploadthing_py.testing import MockUploadThingAPI
+
+
+class GetRequest:
+    """The attributes of a request the GET handler reads"""
+
+    def __init__(self, headers: dict[str, str]):
+        self.headers = headers
+
+
+def make_router():
+    f = create_uploadthing()
+    return {"images": f({"image": {"max_file_size": "4MB"}})}
+
+
+class TestCompiledRouterConfig:
+    def test_recompiles_only_after_modification(self):
+        router = make_router()
+        config = CompiledRouterConfig(router).compile()
+        assert json.loads(config.body) == extract_router_config(router)
+        body, etag = config.body, config.etag
+
+        # Unchanged builders reuse the serialized body
+        assert config.compile().body is body
+
+        # Callbacks bump the version without changing the config
+        router["images"].on_upload_complete(lambda file, metadata: None)
+        assert config.compile().body is not body
+        assert config.etag == etag
+
+        router["images"]({"image": {"max_file_size": "8MB"}})
+        assert config.compile().etag != etag
+
+    def test_matches_if_none_match(self):
+        config = CompiledRouterConfig(make_router()).compile()
+        assert config.matches(config.etag)
+        assert config.matches(f"W/{config.etag}")
+        assert config.matches(f'"other", W/{config.etag}')
+        assert config.matches("*")
+        assert not config.matches('"other"')
+        assert not config.matches(None)
+        assert not config.matches("")
+
+
+@pytest.mark.asyncio
+async def test_get_answers_conditional_requests():
+    app = create_asgi_app(make_router(), "sk_test", False)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await client.get("/api/uploadthing")
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+
+        response = await client.get("/api/uploadthing", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+        assert response.content == b""
+
+        response = await client.get(
+            "/api/uploadthing", headers={"If-None-Match": '"stale"'}
+        )
+        assert response.status_code == 200
+    await app.close()
+
+
+def test_route_handler_get_answers_conditional_requests():
+    handlers = create_route_handler(make_router(), "sk_test", False)
+    response = handlers["GET"](GetRequest({}))
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = handlers["GET"](GetRequest({"if-none-match": f"W/{etag}"}))
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+class TrackingTransport(httpx.MockTransport):
+    """Answers prepareUpload and counts how often it is closed"""
+
+    def __init__(self):
+        super().__init__(self.handle)
+        self.closed = 0
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        files = json.loads(request.content)["files"]
+        return httpx.Response(
+            200, json={"data": [{"key": file["name"]} for file in files]}
+        )
+
+    async def aclose(self):
+        self.closed += 1
+
+
+def upload_request(body: bytes):
+    async def receive():
+        return {"type": "http.request", "body": body}
+
+    return Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "scheme": "http",
+            "server": ("app", 80),
+            "path": "/api/uploadthing",
+            "query_string": b"slug=images&actionType=upload",
+            "headers": [(b"host", b"app")],
+        },
+        receive,
+    )
+
+
+@pytest.mark.asyncio
+async def test_handlers_share_one_client_until_closed(monkeypatch):
+    clients = []
+
+    class CountingClient(httpx.AsyncClient):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            clients.append(self)
+
+    monkeypatch.setattr(client_module, "AsyncClient", CountingClient)
+    transport = TrackingTransport()
+    handlers = create_route_handler(
+        make_router(), "sk_test", False, transport=transport
+    )
+    body = json.dumps(
+        {"files": [{"name": "a.png", "size": 3, "type": "image/png"}]}
+    ).encode()
+
+    async with handlers["lifespan"]():
+        for _ in range(3):
+            result = await handlers["POST"](upload_request(body), Response())
+            assert result == [{"key": "a.png"}]
+        assert len(clients) == 1
+        assert not clients[0].is_closed
+
+    assert clients[0].is_closed
+    assert transport.closed == 1
+
+
+@pytest.mark.parametrize("body", [b"not json", b"\xff\xfe{", b'{"files": 1}'])
+@pytest.mark.asyncio
+async def test_invalid_bodies_get_json_safe_details(body):
+    handlers = create_route_handler(make_router(), "sk_test", False)
+    app = FastAPI(lifespan=handlers["lifespan"])
+
+    @app.post("/api/uploadthing")
+    async def ut_post(request: Request, response: Response):
+        return await handlers["POST"](request=request, response=response)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await client.post(
+            "/api/uploadthing?slug=images&actionType=upload", content=body
+        )
+    await handlers["close"]()
+
+    assert response.status_code == 400
+    content = response.json()
+    assert content["error"] == "Invalid request body"
+    assert content["details"]
+    assert all("input" not in detail for detail in content["details"])
+
+
+@pytest.mark.parametrize("body", [b"not json", b"\xff\xfe{", b""])
+@pytest.mark.asyncio
+async def test_asgi_app_rejects_malformed_bodies(body):
+    app = create_asgi_app(make_router(), "sk_test", False)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await client.post(
+            "/api/uploadthing?slug=images&actionType=upload", content=body
+        )
+    await app.close()
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "Invalid request body"
+
+
+@pytest.mark.asyncio
+async def test_asgi_app_answers_unserializable_errors(monkeypatch):
+    async def handle_post(ctx, request, response):
+        response.status_code = 400
+        return {"error": "Invalid request body", "details": [{"input": b"\xff"}]}
+
+    monkeypatch.setattr(asgi_module, "handle_post", handle_post)
+    app = create_asgi_app(make_router(), "sk_test", False)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await client.post("/api/uploadthing?slug=images", content=b"")
+    await app.close()
+
+    assert response.status_code == 400
+    assert response.json() == {"error": "Bad request"}
+
+
+@pytest.mark.asyncio
+async def test_asgi_app_added_under_a_prefix():
+    api = MockUploadThingAPI()
+    ut_app = create_asgi_app(
+        make_router(),
+        "sk_test",
+        False,
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+    )
+    app = FastAPI(lifespan=ut_app.lifespan)
+    app.add_route("/api/uploadthing", ut_app)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await client.get("/api/uploadthing")
+        assert response.status_code == 200
+        assert response.json() == extract_router_config(make_router())
+
+        response = await client.post(
+            "/api/uploadthing?slug=images&actionType=upload",
+            json={"files": [{"name": "a.png", "size": 3, "type": "image/png"}]},
+        )
+        assert response.status_code == 200
+        (presigned,) = response.json()
+
+        response = await client.options("/api/uploadthing")
+        assert response.status_code == 204
+        assert "OPTIONS" in response.headers["allow"]
+    await ut_app.close()
+
+    file = api.files[presigned["key"]]
+    assert file["callbackUrl"] == "http://app/api/uploadthing"
+    assert file["callbackSlug"] == "images"
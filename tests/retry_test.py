@@ -0,0 +1,94 @@
+import httpx
+import pytest
+from uploadthing_py import RetryPolicy
+
+
+def make_send(*outcomes):
+    calls = []
+
+    async def send():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome)
+
+    return send, calls
+
+
+def make_send_sync(*outcomes):
+    calls = []
+
+    def send():
+        outcome = outcomes[len(calls)]
+        calls.append(outcome)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return httpx.Response(outcome, headers={"Retry-After": "0"})
+
+    return send, calls
+
+
+class TestRetryPolicy:
+    @pytest.mark.asyncio
+    async def test_retries_transient_status(self):
+        policy = RetryPolicy(base_delay=0)
+        send, calls = make_send(502, 200)
+        response = await policy.send("/v6/listFiles", send)
+        assert response.status_code == 200
+        assert len(calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_does_not_repeat_non_idempotent_request(self):
+        policy = RetryPolicy(base_delay=0)
+        send, calls = make_send(502, 200)
+        response = await policy.send("/v7/prepareUpload", send)
+        assert response.status_code == 502
+        assert len(calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_retries_server_callback(self):
+        # Sent inline by the route handler or from the deferred queue alike
+        policy = RetryPolicy(base_delay=0)
+        send, calls = make_send(502, httpx.ReadError("reset"), 200)
+        response = await policy.send("/v6/serverCallback", send)
+        assert response.status_code == 200
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_retries_unsent_request_for_any_path(self):
+        policy = RetryPolicy(base_delay=0)
+        send, calls = make_send(httpx.ConnectError("refused"), 429, 200)
+        response = await policy.send("/v7/prepareUpload", send)
+        assert response.status_code == 200
+        assert len(calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        policy = RetryPolicy(base_delay=0, max_attempts=2)
+        send, calls = make_send(httpx.ReadError("reset"), httpx.ReadError("reset"), 200)
+        with pytest.raises(httpx.ReadError):
+            await policy.send("/v6/listFiles", send)
+        assert len(calls) == 2
+
+    def test_backoff_honors_retry_after(self):
+        policy = RetryPolicy(base_delay=0.1, max_delay=1)
+        response = httpx.Response(429, headers={"Retry-After": "3"})
+        assert policy.backoff(1, response) == 3
+        assert 0 <= policy.backoff(10) <= 1
+
+    def test_send_sync_retries_rejected_status(self):
+        policy = RetryPolicy(base_delay=0)
+        send, calls = make_send_sync(429, 503, 200)
+        response = policy.send_sync("/v7/prepareUpload", send)
+        assert response.status_code == 200
+        assert len(calls) == 3
+
+    def test_send_sync_raises_the_last_error(self):
+        policy = RetryPolicy(base_delay=0, max_attempts=2)
+        send, calls = make_send_sync(
+            httpx.ConnectError("refused"), httpx.ConnectError("refused")
+        )
+        with pytest.raises(httpx.ConnectError):
+            policy.send_sync("/v6/listFiles", send)
+        assert len(calls) == 2
@@ -0,0 +1,251 @@
+import time
+
+import httpx
+import pytest
+from uploadthing_py import UploadSessionStore, create_asgi_app, create_uploadthing
+from uploadthing_py.retry import NO_RETRY
+from uploadthing_py.sessions import MemorySessionBackend, RedisSessionBackend
+from uploadthing_py.testing import MockUploadThingAPI
+from uploadthing_py.utils import json_stringify, sign_payload
+
+
+class FakeRedis:
+    """The subset of ``redis.asyncio.Redis`` used by ``RedisSessionBackend``"""
+
+    def __init__(self):
+        self.data: dict[str, tuple[bytes, float]] = {}
+
+    async def set(self, key, value, px=None, nx=False):
+        if nx and await self.get(key) is not None:
+            return None
+        self.data[key] = (value, time.monotonic() + px / 1000)
+        return True
+
+    async def get(self, key):
+        value, expires_at = self.data.get(key, (None, 0))
+        return value if expires_at > time.monotonic() else None
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+@pytest.mark.parametrize(
+    "backend", [MemorySessionBackend, lambda: RedisSessionBackend(FakeRedis())]
+)
+@pytest.mark.asyncio
+async def test_claims_each_callback_once(backend):
+    store = UploadSessionStore(backend())
+    assert await store.claim_callback("abc")
+    assert not await store.claim_callback("abc")
+    await store.release_callback("abc")
+    assert await store.claim_callback("abc")
+
+    assert await store.get_server_callback("abc") is None
+    await store.store_server_callback("abc", b'{"fileKey":"abc"}')
+    assert await store.get_server_callback("abc") == b'{"fileKey":"abc"}'
+    await store.server_callback_sent("abc")
+    assert await store.get_server_callback("abc") is None
+
+
+@pytest.mark.asyncio
+async def test_records_presigned_uploads():
+    store = UploadSessionStore(MemorySessionBackend(maxsize=1))
+    assert await store.get_upload("abc") is None
+    await store.record_upload("images", {"key": "abc", "fileName": "a.png"})
+    assert await store.get_upload("abc") == {
+        "slug": "images",
+        "name": "a.png",
+        "callback": False,
+    }
+    assert await store.claim_callback("abc")
+    await store.record_callback("abc")
+    assert (await store.get_upload("abc"))["callback"]
+
+    # Upload records evict each other, but never a claim
+    await store.record_upload("images", {"key": "def", "fileName": "b.png"})
+    assert await store.get_upload("abc") is None
+    assert not await store.claim_callback("abc")
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_expires_and_evicts():
+    backend = MemorySessionBackend(maxsize=2)
+    await backend.set("a", b"1", ttl=0)
+    assert await backend.get("a") is None
+
+    for key in ("a", "b", "c"):
+        await backend.set(key, b"1", ttl=60)
+    assert await backend.get("a") is None
+    assert len(backend) == 2
+
+
+CALLBACK_PAYLOAD = json_stringify(
+    {
+        "status": "uploaded",
+        "metadata": {},
+        "file": {
+            "name": "a.png",
+            "size": 3,
+            "type": "image/png",
+            "key": "abc",
+            "url": "https://utfs.io/f/abc",
+        },
+    }
+)
+
+
+async def deliver_callback(client: httpx.AsyncClient) -> httpx.Response:
+    return await client.post(
+        "/api/uploadthing?slug=images",
+        content=CALLBACK_PAYLOAD,
+        headers={
+            "uploadthing-hook": "callback",
+            "x-uploadthing-signature": sign_payload(CALLBACK_PAYLOAD, "sk_test"),
+        },
+    )
+
+
+class FailingServerCallback(httpx.AsyncBaseTransport):
+    """Fails the first serverCallback with ``failure``, passes the rest to ``api``"""
+
+    def __init__(self, api: MockUploadThingAPI, failure: Exception | int):
+        self._api = httpx.ASGITransport(api)
+        self._failure = failure
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/v6/serverCallback" and self._failure is not None:
+            failure, self._failure = self._failure, None
+            if isinstance(failure, Exception):
+                raise failure
+            return httpx.Response(failure)
+        return await self._api.handle_async_request(request)
+
+
+@pytest.mark.asyncio
+async def test_duplicate_webhooks_run_on_upload_complete_once():
+    api = MockUploadThingAPI()
+    completed = []
+
+    def on_upload_complete(file, metadata):
+        completed.append(file.key)
+        if len(completed) == 1:
+            raise RuntimeError("downstream unavailable")
+
+    f = create_uploadthing()
+    router = {"images": f({"image": {}}).on_upload_complete(on_upload_complete)}
+    app = create_asgi_app(
+        router,
+        "sk_test",
+        False,
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        # A failed callback releases its claim, so the retry runs it again
+        response = await deliver_callback(client)
+        assert response.status_code == 500
+        assert response.json() == {"error": "Failed to run complete callback"}
+        for _ in range(2):
+            response = await deliver_callback(client)
+            assert response.json() == {"success": True}
+    await app.close()
+
+    assert completed == ["abc", "abc"]
+    assert api.requests["/v6/serverCallback"] == 1
+
+
+@pytest.mark.parametrize(
+    "failure, status_code, content",
+    [
+        (httpx.ConnectError("refused"), 500, {"error": "Internal server error"}),
+        (503, 502, {"error": "Failed to send server callback"}),
+    ],
+)
+@pytest.mark.asyncio
+async def test_failed_server_callback_is_sent_on_redelivery(
+    failure, status_code, content
+):
+    api = MockUploadThingAPI()
+    completed = []
+    f = create_uploadthing()
+    router = {
+        "images": f({"image": {}}).on_upload_complete(
+            lambda file, metadata: completed.append(file.key)
+        )
+    }
+    app = create_asgi_app(
+        router,
+        "sk_test",
+        False,
+        base_url=api.base_url,
+        transport=FailingServerCallback(api, failure),
+        retry_policy=NO_RETRY,
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await deliver_callback(client)
+        assert response.status_code == status_code
+        assert response.json() == content
+
+        # Redeliveries only send serverCallback, until it succeeds
+        for _ in range(2):
+            response = await deliver_callback(client)
+            assert response.status_code == 200
+            assert response.json() == {"success": True}
+    await app.close()
+
+    assert completed == ["abc"]
+    assert api.requests["/v6/serverCallback"] == 1
+
+
+@pytest.mark.asyncio
+async def test_callbacks_are_matched_to_their_recorded_upload():
+    api = MockUploadThingAPI()
+    store = UploadSessionStore()
+    completed = []
+    f = create_uploadthing()
+    router = {
+        "images": f({"image": {}}).on_upload_complete(
+            lambda file, metadata: completed.append(file.key)
+        ),
+        "videos": f({"video": {}}),
+    }
+    app = create_asgi_app(
+        router,
+        "sk_test",
+        False,
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+        session_store=store,
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app), base_url="http://app"
+    ) as client:
+        response = await client.post(
+            "/api/uploadthing?slug=images&actionType=upload",
+            json={"files": [{"name": "a.png", "size": 3, "type": "image/png"}]},
+        )
+        (presigned,) = response.json()
+        assert await store.get_upload(presigned["key"]) == {
+            "slug": "images",
+            "name": "a.png",
+            "callback": False,
+        }
+
+        await store.record_upload("videos", {"key": "abc"})
+        response = await deliver_callback(client)
+        assert response.status_code == 400
+        assert response.json() == {
+            "error": "Callback for an upload of another uploader"
+        }
+
+        await store.record_upload("images", {"key": "abc"})
+        response = await deliver_callback(client)
+        assert response.json() == {"success": True}
+    await app.close()
+
+    assert completed == ["abc"]
+    assert (await store.get_upload("abc"))["callback"]
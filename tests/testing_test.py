@@ -0,0 +1,115 @@
+import httpx
+import pytest
+from uploadthing_py import (
+    NO_RETRY,
+    RetryPolicy,
+    UTApi,
+    UploadFiles,
+    create_asgi_app,
+    create_uploadthing,
+)
+from uploadthing_py.testing import MockUploadThingAPI
+from uploadthing_py.utapi import HttpError
+from uploadthing_py.utils import json_stringify, sign_payload
+
+
+def make_client(api: MockUploadThingAPI, **options) -> UTApi:
+    return UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+        **options,
+    )
+
+
+class TestMockUploadThingAPI:
+    @pytest.mark.asyncio
+    async def test_file_lifecycle(self):
+        api = MockUploadThingAPI(chunk_size=4)
+        async with make_client(api) as client:
+            small, large = await client.upload_files(
+                [
+                    UploadFiles.FileEsque("small.txt", b"abc"),
+                    UploadFiles.FileEsque("large.txt", b"0123456789"),
+                ]
+            )
+            assert api.requests["/upload"] == 1 + 3
+            assert api.requests["/v6/completeMultipart"] == 1
+
+            usage = await client.get_usage_info()
+            assert usage.files_uploaded == 2
+            assert usage.app_total_bytes == 13
+
+            await client.rename_files({"key": small.key, "new_name": "renamed.txt"})
+            files = await client.list_files()
+            assert [file.name for file in files] == ["renamed.txt", "large.txt"]
+
+            response = await client.delete_files([small.key, large.key])
+            assert response.deleted_count == 2
+            assert await client.list_files() == []
+
+    @pytest.mark.asyncio
+    async def test_injected_errors(self):
+        api = MockUploadThingAPI(error_rate=1.0)
+        async with make_client(api, retry_policy=NO_RETRY) as client:
+            with pytest.raises(HttpError):
+                await client.get_usage_info()
+
+        api = MockUploadThingAPI(error_rate=0.5, seed=1)
+        async with make_client(
+            api, retry_policy=RetryPolicy(base_delay=0, max_attempts=10)
+        ) as client:
+            for _ in range(10):
+                await client.get_usage_info()
+        assert api.requests["/v6/getUsageInfo"] > 10
+
+    @pytest.mark.asyncio
+    async def test_route_handler_cycle(self):
+        api = MockUploadThingAPI()
+        f = create_uploadthing()
+        router = {
+            "images": f({"image": {"max_file_size": "4MB"}})
+            .middleware(lambda request: {"user_id": "1"})
+            .on_upload_complete(lambda file, metadata: {"by": metadata["user_id"]})
+        }
+        app = create_asgi_app(
+            router,
+            "sk_test",
+            False,
+            base_url=api.base_url,
+            transport=httpx.ASGITransport(api),
+        )
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app), base_url="http://app"
+        ) as client:
+            response = await client.post(
+                "/api/uploadthing?slug=images&actionType=upload",
+                json={"files": [{"name": "a.png", "size": 3, "type": "image/png"}]},
+            )
+            (presigned,) = response.json()
+
+            payload = json_stringify(
+                {
+                    "status": "uploaded",
+                    "metadata": {"user_id": "1"},
+                    "file": {
+                        "name": "a.png",
+                        "size": 3,
+                        "type": "image/png",
+                        "key": presigned["key"],
+                        "url": presigned["fileUrl"],
+                    },
+                }
+            )
+            response = await client.post(
+                "/api/uploadthing?slug=images",
+                content=payload,
+                headers={
+                    "uploadthing-hook": "callback",
+                    "x-uploadthing-signature": sign_payload(payload, "sk_test"),
+                },
+            )
+            assert response.json() == {"success": True}
+        await app.close()
+
+        assert api.files[presigned["key"]]["callbackData"] == {"by": "1"}
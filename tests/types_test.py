@@ -0,0 +1,31 @@
+import pytest
+from pydantic import ValidationError
+from uploadthing_py.types import (
+    CompleteMPURequest,
+    FailureRequest,
+    UploadRequest,
+    parse_request_body,
+)
+
+
+class TestParseRequestBody:
+    def test_selects_model_by_action_type(self):
+        body = parse_request_body(
+            b'{"files":[{"name":"a.png","size":1,"type":"image/png"}]}', None, "upload"
+        )
+        assert isinstance(body, UploadRequest)
+
+        body = parse_request_body(
+            b'{"fileKey":"k","uploadId":"u","etags":[]}', None, "multipart-complete"
+        )
+        assert isinstance(body, CompleteMPURequest)
+
+    def test_reports_errors_against_one_model(self):
+        with pytest.raises(ValidationError) as e:
+            parse_request_body(b'{"fileKey":"k"}', None, "failure")
+        assert e.value.title == FailureRequest.__name__
+        assert [error["loc"] for error in e.value.errors()] == [("fileName",)]
+
+    def test_unknown_action(self):
+        with pytest.raises(KeyError):
+            parse_request_body(b"{}", None, "unknown")
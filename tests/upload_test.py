@@ -0,0 +1,161 @@
+import asyncio
+import io
+
+import httpx
+import pytest
+from uploadthing_py import RetryPolicy, UTApi, UploadFiles
+from uploadthing_py import utapi as utapi_module
+from uploadthing_py.testing import MockUploadThingAPI
+from uploadthing_py.upload import iter_chunks
+from uploadthing_py.utapi import HttpError
+
+
+class ShortReads(io.RawIOBase):
+    """A raw stream returning at most 7 bytes per read, like a socket"""
+
+    def __init__(self, data: bytes):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        chunk = self._data.read(min(len(buffer), 7))
+        buffer[: len(chunk)] = chunk
+        return len(chunk)
+
+
+@pytest.mark.asyncio
+async def test_iter_chunks_fills_chunks_from_short_reads():
+    data = bytes(range(95))
+    chunks = [bytes(chunk) async for chunk in iter_chunks(ShortReads(data), 10)]
+    assert [len(chunk) for chunk in chunks] == [10] * 9 + [5]
+    assert b"".join(chunks) == data
+
+    chunks = [bytes(chunk) async for chunk in iter_chunks(ShortReads(data), 10, 30)]
+    assert b"".join(chunks) == data[30:]
+
+
+@pytest.mark.asyncio
+async def test_multipart_upload_from_short_reads():
+    api = MockUploadThingAPI(chunk_size=10)
+    async with UTApi(
+        "sk_test", base_url=api.base_url, transport=httpx.ASGITransport(api)
+    ) as utapi:
+        response = await utapi.upload_files(
+            UploadFiles.FileEsque("a.bin", ShortReads(bytes(95)), size=95)
+        )
+    assert api.requests["/upload"] == 10
+    assert api.files[response.key]["status"] == "Uploaded"
+
+
+@pytest.mark.parametrize("size", [50, 150])
+@pytest.mark.asyncio
+async def test_source_not_matching_its_size(size):
+    api = MockUploadThingAPI(chunk_size=10)
+    async with UTApi(
+        "sk_test", base_url=api.base_url, transport=httpx.ASGITransport(api)
+    ) as utapi:
+        with pytest.raises(ValueError, match="size"):
+            await utapi.upload_files(
+                UploadFiles.FileEsque("a.bin", io.BytesIO(bytes(95)), size=size)
+            )
+    assert api.requests["/v6/completeMultipart"] == 0
+    assert api.requests["/v6/failureCallback"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_file_cancels_the_others():
+    api = MockUploadThingAPI(chunk_size=10, latency=0.01)
+
+    async def storage(scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("bad.bin"):
+            await send({"type": "http.response.start", "status": 500})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await api(scope, receive, send)
+
+    async with UTApi(
+        "sk_test", base_url=api.base_url, transport=httpx.ASGITransport(storage)
+    ) as utapi:
+        with pytest.raises(HttpError):
+            await utapi.upload_files(
+                [
+                    UploadFiles.FileEsque("good.bin", bytes(200)),
+                    UploadFiles.FileEsque("bad.bin", b"abc"),
+                ]
+            )
+
+    # The multipart upload of good.bin is aborted instead of completed
+    assert api.requests["/v6/completeMultipart"] == 0
+    assert api.requests["/v6/failureCallback"] == 1
+    assert [file["name"] for file in api.files.values()] == ["bad.bin"]
+
+
+@pytest.mark.parametrize("failure", ["error", "timeout"])
+@pytest.mark.asyncio
+async def test_failed_failure_callback_keeps_the_upload_error(monkeypatch, failure):
+    monkeypatch.setattr(utapi_module, "FAILURE_CALLBACK_TIMEOUT", 0.05)
+    api = MockUploadThingAPI(chunk_size=10)
+    failure_callbacks = 0
+
+    async def storage(scope, receive, send):
+        nonlocal failure_callbacks
+        if scope["type"] == "http" and scope["path"] == "/v6/failureCallback":
+            failure_callbacks += 1
+            if failure == "timeout":
+                await asyncio.sleep(10)
+            await send({"type": "http.response.start", "status": 503})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await api(scope, receive, send)
+
+    async with UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(storage),
+        retry_policy=RetryPolicy(base_delay=0),
+    ) as utapi:
+        with pytest.raises(ValueError, match="size"):
+            await utapi.upload_files(
+                UploadFiles.FileEsque("a.bin", io.BytesIO(bytes(95)), size=50)
+            )
+    # 503 is retried for other requests, but the failure is reported once
+    assert failure_callbacks == 1
+
+
+@pytest.mark.asyncio
+async def test_prepare_upload_must_answer_every_file():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"data": [{"key": "a", "url": "x"}]})
+
+    async with UTApi(
+        "sk_test",
+        base_url="http://uploadthing.mock",
+        transport=httpx.MockTransport(handler),
+    ) as utapi:
+        with pytest.raises(ValueError, match="1 presigned uploads for 2 files"):
+            await utapi.upload_files(
+                [
+                    UploadFiles.FileEsque("a.bin", b"a"),
+                    UploadFiles.FileEsque("b.bin", b"b"),
+                ]
+            )
+
+
+@pytest.mark.asyncio
+async def test_upload_client_is_created_by_the_first_upload():
+    api = MockUploadThingAPI()
+    utapi = UTApi("sk_test", base_url=api.base_url, transport=httpx.ASGITransport(api))
+    await utapi.list_files()
+    assert utapi._upload_client is None
+    await utapi.aclose()
+
+    async with UTApi(
+        "sk_test", base_url=api.base_url, transport=httpx.ASGITransport(api)
+    ) as utapi:
+        await utapi.upload_files(UploadFiles.FileEsque("a.bin", b"a"))
+        upload_client = utapi._upload_client
+        await utapi.upload_files(UploadFiles.FileEsque("b.bin", b"b"))
+        assert utapi._upload_client is upload_client
+    assert upload_client.is_closed
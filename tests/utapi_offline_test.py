@@ -0,0 +1,313 @@
+import asyncio
+import contextlib
+import json
+import threading
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from uploadthing_py import ListFiles, NO_RETRY, RetryPolicy, SyncUTApi, UTApi
+from uploadthing_py import utapi as utapi_module
+from uploadthing_py.utapi import HttpError
+
+
+def make_client(handler) -> UTApi:
+    return UTApi(
+        "sk_test",
+        base_url="http://uploadthing.mock",
+        transport=httpx.MockTransport(handler),
+        retry_policy=NO_RETRY,
+    )
+
+
+class TestBulkOperations:
+    @pytest.mark.asyncio
+    async def test_reports_failed_batches(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            keys = json.loads(request.content)["fileKeys"]
+            if "bad" in keys:
+                return httpx.Response(500, json={"error": "Internal error"})
+            return httpx.Response(
+                200, json={"success": True, "deletedCount": len(keys)}
+            )
+
+        keys = ["a", "b", "c", "bad", "d", "e", "f"]
+        async with make_client(handler) as client:
+            response = await client.bulk_delete_files(
+                keys, bulk_options={"batch_size": 2, "concurrency": 2}
+            )
+
+        assert not response.success
+        assert response.batches == 4
+        assert response.deleted_count == 5
+        (error,) = response.errors
+        assert error.batch == 1
+        assert error.items == ["c", "bad"]
+        assert isinstance(error.error, HttpError)
+        assert error.error.status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_bulk_rename_reports_failed_batches(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            updates = json.loads(request.content)["updates"]
+            if any(update["newName"] == "bad" for update in updates):
+                return httpx.Response(400, json={"error": "Invalid name"})
+            return httpx.Response(200, json={"success": True})
+
+        updates = [{"key": str(i), "new_name": f"{i}.txt"} for i in range(5)]
+        updates[4]["new_name"] = "bad"
+        async with make_client(handler) as client:
+            response = await client.bulk_rename_files(
+                updates, bulk_options={"batch_size": 2}
+            )
+
+        assert not response.success
+        assert response.batches == 3
+        assert [error.batch for error in response.errors] == [2]
+
+
+class ListFilesAPI:
+    """
+    Serves ``count`` files, the n-th page after ``latency(n)`` seconds. Pages
+    from ``stall_from`` on never finish.
+    """
+
+    def __init__(
+        self,
+        count: int,
+        stall_from: int | None = None,
+        latency: t.Callable[[int], float] = lambda page: 0.005 * (page + 1),
+    ):
+        self.count = count
+        self.stall_from = count if stall_from is None else stall_from
+        self.latency = latency
+        self.requested: list[int] = []
+        self.cancelled: list[int] = []
+        self.answered: list[int] = []
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        offset, limit = body["offset"], body["limit"]
+        self.requested.append(offset)
+        try:
+            stalled = offset >= self.stall_from
+            await asyncio.sleep(10 if stalled else self.latency(offset // limit))
+        except asyncio.CancelledError:
+            self.cancelled.append(offset)
+            raise
+        self.answered.append(offset)
+        files = [
+            {"id": str(i), "customId": None, "key": f"f{i}", "name": "", "status": ""}
+            for i in range(offset, min(offset + limit, self.count))
+        ]
+        return httpx.Response(
+            200, json={"files": files, "hasMore": offset + limit < self.count}
+        )
+
+
+class ListFilesRecorder:
+    """Records the body of every listFiles request and answers one file"""
+
+    def __init__(self):
+        self.bodies: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.bodies.append(json.loads(request.content))
+        file = {"id": "1", "customId": None, "key": "k", "name": "a", "status": ""}
+        return httpx.Response(200, json={"files": [file], "hasMore": False})
+
+
+LIST_FILES_OPTIONS = [
+    (None, {}),
+    ({"limit": 5}, {"limit": 5}),
+    (ListFiles.ListFilesOptions(limit=5, offset=10), {"limit": 5, "offset": 10}),
+]
+
+
+class TestListFiles:
+    @pytest.mark.parametrize("options, body", LIST_FILES_OPTIONS)
+    @pytest.mark.asyncio
+    async def test_accepts_mappings_and_options(self, options, body):
+        api = ListFilesRecorder()
+        async with make_client(api) as client:
+            (file,) = await client.list_files(options)
+        assert file.key == "k"
+        assert api.bodies == [body]
+
+    @pytest.mark.parametrize("options, body", LIST_FILES_OPTIONS)
+    def test_sync_accepts_mappings_and_options(self, options, body):
+        api = ListFilesRecorder()
+        with SyncUTApi(
+            "sk_test",
+            base_url="http://uploadthing.mock",
+            transport=httpx.MockTransport(api),
+        ) as client:
+            (file,) = client.list_files(options)
+        assert file.key == "k"
+        assert api.bodies == [body]
+
+
+class TestIterFiles:
+    @pytest.mark.asyncio
+    async def test_yields_pages_in_order(self):
+        # Earlier pages finish last
+        api = ListFilesAPI(count=5, latency=lambda page: 0.005 * (3 - page))
+        async with make_client(api) as client:
+            keys = [file.key async for file in client.iter_files(2, concurrency=3)]
+        assert keys == [f"f{i}" for i in range(5)]
+
+    @pytest.mark.asyncio
+    async def test_cancels_pages_past_the_end(self):
+        api = ListFilesAPI(count=5, stall_from=5)
+        async with make_client(api) as client:
+            keys = [file.key async for file in client.iter_files(2, concurrency=3)]
+            await asyncio.sleep(0.02)
+        assert keys == [f"f{i}" for i in range(5)]
+        # Pages past the end were requested while the last ones were pending
+        assert 6 in api.requested
+        assert sorted(api.answered) == [0, 2, 4]
+        assert sorted(api.cancelled) == sorted(set(api.requested) - {0, 2, 4})
+
+    @pytest.mark.asyncio
+    async def test_breaking_early_cancels_pending_pages(self):
+        api = ListFilesAPI(count=100, stall_from=2)
+        async with make_client(api) as client:
+            async with contextlib.aclosing(
+                client.iter_files(2, concurrency=3)
+            ) as files:
+                async for file in files:
+                    break
+            await asyncio.sleep(0.02)
+        assert file.key == "f0"
+        assert api.answered == [0]
+        assert sorted(api.requested) == [0, 2, 4]
+        assert sorted(api.cancelled) == [2, 4]
+
+
+class SignedUrlAPI:
+    """Signs any key but "bad", earlier keys in ``order`` answer last"""
+
+    def __init__(self, order: list[str]):
+        self.order = order
+        self.requested: list[str] = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        key = json.loads(request.content)["fileKey"]
+        self.requested.append(key)
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(0.002 * (len(self.order) - self.order.index(key)))
+        finally:
+            self.in_flight -= 1
+        if key == "bad":
+            return httpx.Response(500, json={"error": "Internal error"})
+        return httpx.Response(200, json={"url": f"https://utfs.io/f/{key}?signed"})
+
+
+class TestGetSignedUrls:
+    @pytest.mark.asyncio
+    async def test_dedupes_keys_and_keeps_input_order(self):
+        keys = ["c", "a", "bad", "c", "d", "b", "a"]
+        api = SignedUrlAPI(order=["c", "a", "bad", "d", "b"])
+        async with make_client(api) as client:
+            response = await client.get_signed_urls(keys, concurrency=2)
+
+        assert sorted(api.requested) == ["a", "b", "bad", "c", "d"]
+        assert api.max_in_flight == 2
+        assert list(response.urls) == ["c", "a", "d", "b"]
+        assert response.urls["a"].url == "https://utfs.io/f/a?signed"
+        assert list(response.errors) == ["bad"]
+        assert isinstance(response.errors["bad"], HttpError)
+        assert response.errors["bad"].status_code == 500
+
+
+USAGE_INFO = {
+    "totalBytes": 3,
+    "appTotalBytes": 3,
+    "filesUploaded": 1,
+    "limitBytes": 2 * 1024**3,
+}
+
+
+@pytest.fixture
+def clients(monkeypatch) -> list[httpx.Client]:
+    """Every ``httpx.Client`` created by ``SyncUTApi``"""
+    created = []
+
+    class CountingClient(httpx.Client):
+        def __init__(self, **kwargs):
+            super().__init__(**kwargs)
+            created.append(self)
+
+    monkeypatch.setattr(utapi_module, "Client", CountingClient)
+    return created
+
+
+class TestSyncUTApi:
+    def test_reuses_one_client(self, clients):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/v6/getUsageInfo":
+                return httpx.Response(200, json=USAGE_INFO)
+            return httpx.Response(200, json={"success": True, "deletedCount": 1})
+
+        with SyncUTApi(
+            "sk_test",
+            base_url="http://uploadthing.mock",
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            for _ in range(3):
+                assert client.get_usage_info().files_uploaded == 1
+                assert client.delete_files("a").deleted_count == 1
+
+        (http,) = clients
+        assert http.is_closed
+
+    def test_retries_rejected_requests(self):
+        statuses = [429, 503, 200]
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            status = statuses.pop(0)
+            if status != 200:
+                return httpx.Response(status, headers={"Retry-After": "0"})
+            return httpx.Response(200, json=USAGE_INFO)
+
+        with SyncUTApi(
+            "sk_test",
+            base_url="http://uploadthing.mock",
+            transport=httpx.MockTransport(handler),
+            retry_policy=RetryPolicy(base_delay=0),
+        ) as client:
+            assert client.get_usage_info().total_bytes == 3
+
+        assert statuses == []
+        assert client.metrics.retries["/v6/getUsageInfo"] == 2
+        assert client.metrics.statuses["/v6/getUsageInfo", "200"] == 1
+
+    def test_shared_between_threads(self, clients):
+        threads = set()
+        lock = threading.Lock()
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            with lock:
+                threads.add(threading.get_ident())
+            key = json.loads(request.content)["fileKeys"][0]
+            return httpx.Response(200, json={"success": True, "deletedCount": len(key)})
+
+        with SyncUTApi(
+            "sk_test",
+            base_url="http://uploadthing.mock",
+            transport=httpx.MockTransport(handler),
+        ) as client:
+            keys = ["k" * (i % 7 + 1) for i in range(200)]
+            with ThreadPoolExecutor(8) as pool:
+                results = list(pool.map(client.delete_files, keys))
+
+        assert [result.deleted_count for result in results] == [len(k) for k in keys]
+        assert len(threads) > 1
+        assert len(clients) == 1
+        assert client.metrics.statuses["/v6/deleteFiles", "200"] == 200
+        assert client.metrics.in_flight == 0
@@ -1,46 +1,84 @@
 import pytest
-from uploadthing_py import UTApi, File, GetUsageInfo, GetSignedUrl
+from uploadthing_py import (
+    UTApi,
+    SyncUTApi,
+    File,
+    UploadFiles,
+    GetUsageInfo,
+    GetSignedUrl,
+)
 import os
 
 API_KEY = os.getenv("UPLOADTHING_TEST_SECRET")
 if not API_KEY:
-    raise Exception("Please set the UPLOADTHING_TEST_SECRET environment variable")
+    pytest.skip(
+        "UPLOADTHING_TEST_SECRET is not set, see tests/testing_test.py for the "
+        "offline tests",
+        allow_module_level=True,
+    )
+
+
+@pytest.fixture
+async def client():
+    async with UTApi(API_KEY) as client:
+        yield client
+
+
+class TestUploadFiles:
+    @pytest.mark.asyncio
+    async def test_upload_files_single(self, client):
+        response = await client.upload_files(
+            UploadFiles.FileEsque("test.txt", b"Hello from uploadthing.py")
+        )
+        assert isinstance(response, UploadFiles.UploadFileResponse)
+        assert response.size == 25
+        await client.delete_files(response.key)
 
 
 class TestDeleteFiles:
     @pytest.mark.asyncio
-    async def test_delete_files_single(self):
-        client = UTApi(API_KEY)
+    async def test_delete_files_single(self, client):
         response = await client.delete_files("test")
         assert response.success
         assert isinstance(response.deleted_count, int)
 
     @pytest.mark.asyncio
-    async def test_delete_files_multiple(self):
-        client = UTApi(API_KEY)
+    async def test_delete_files_multiple(self, client):
         response = await client.delete_files(["test", "test2"])
         assert response.success
         assert isinstance(response.deleted_count, int)
 
+    @pytest.mark.asyncio
+    async def test_bulk_delete_files(self, client):
+        response = await client.bulk_delete_files(
+            ["test", "test2", "test3"], bulk_options={"batch_size": 2}
+        )
+        assert response.success
+        assert response.batches == 2
+        assert isinstance(response.deleted_count, int)
+
 
 class TestListFiles:
     @pytest.mark.asyncio
-    async def test_list_files_single(self):
-        client = UTApi(API_KEY)
+    async def test_list_files_single(self, client):
         file, *_ = await client.list_files()
         assert isinstance(file, File)
 
+    @pytest.mark.asyncio
+    async def test_iter_files(self, client):
+        files = [file async for file in client.iter_files(page_size=2, concurrency=2)]
+        assert all(isinstance(file, File) for file in files)
+        assert len({file.key for file in files}) == len(files)
+
 
 class TestRenameFiles:
     @pytest.mark.asyncio
-    async def test_rename_files_single(self):
-        client = UTApi(API_KEY)
+    async def test_rename_files_single(self, client):
         response = await client.rename_files({"key": "test", "new_name": "test2"})
         assert response.success
 
     @pytest.mark.asyncio
-    async def test_rename_files_multiple(self):
-        client = UTApi(API_KEY)
+    async def test_rename_files_multiple(self, client):
         response = await client.rename_files(
             [
                 {"key": "test", "new_name": "test2"},
@@ -52,25 +90,46 @@ class TestRenameFiles:
 
 class TestGetUsageInfo:
     @pytest.mark.asyncio
-    async def test_get_usage_info(self):
-        client = UTApi(API_KEY)
+    async def test_get_usage_info(self, client):
         response = await client.get_usage_info()
         assert isinstance(response, GetUsageInfo.GetUsageInfoResponse)
 
 
 class TestGetSignedUrl:
     @pytest.mark.asyncio
-    async def test_get_signed_url(self):
-        client = UTApi(API_KEY)
+    async def test_get_signed_url(self, client):
         response = await client.get_signed_url(
             "7337d5a2-7c2c-45fa-818f-662586045897-eh6k28.heic"
         )
         assert isinstance(response, GetSignedUrl.GetSignedUrlResponse)
 
+    @pytest.mark.asyncio
+    async def test_get_signed_urls(self, client):
+        key = "7337d5a2-7c2c-45fa-818f-662586045897-eh6k28.heic"
+        response = await client.get_signed_urls([key, key])
+        assert list(response.urls) == [key]
+        assert not response.errors
+
 
 class TestUpdateACL:
     @pytest.mark.asyncio
-    async def test_update_acl(self):
-        client = UTApi(API_KEY)
+    async def test_update_acl(self, client):
         response = await client.update_acl("test", "public-read")
         assert response.success
+
+
+class TestSyncUTApi:
+    def test_list_files(self):
+        with SyncUTApi(API_KEY) as client:
+            file, *_ = client.list_files()
+            assert isinstance(file, File)
+
+    def test_delete_files(self):
+        with SyncUTApi(API_KEY) as client:
+            response = client.delete_files(["test", "test2"])
+            assert response.success
+
+    def test_get_usage_info(self):
+        with SyncUTApi(API_KEY) as client:
+            response = client.get_usage_info()
+            assert isinstance(response, GetUsageInfo.GetUsageInfoResponse)
@@ -0,0 +1,138 @@
+import asyncio
+import contextvars
+import dataclasses
+import enum
+import json
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from uploadthing_py import File
+from uploadthing_py.utils import (
+    PayloadSigner,
+    generate_signed_url,
+    json_stringify,
+    run_callback,
+    sign_payload,
+    verify_signature,
+)
+
+
+def legacy_json_stringify(o) -> bytes:
+    # json_stringify before the module level encoder, the reference output
+    class EnhancedJSONEncoder(json.JSONEncoder):
+        def default(self, o):
+            if dataclasses.is_dataclass(o):
+                return dataclasses.asdict(o)
+            return super().default(o)
+
+    return json.dumps(o, cls=EnhancedJSONEncoder, separators=(",", ":")).encode()
+
+
+@dataclasses.dataclass
+class Private:
+    _secret: int
+    tags: list
+
+
+class Size(enum.IntEnum):
+    SMALL = 1
+
+
+class TestJsonStringify:
+    @pytest.mark.parametrize(
+        "payload",
+        [
+            {"files": [{"name": "a.png", "size": 1024}], "ok": True, "n": False},
+            {"name": "été.png", "emoji": "\U0001f600", "sep": "\u2028"},
+            {"quote": 'a"b', "slash": "a\\b", "control": "\n\x00\x7f"},
+            {"customId": None, "metadata": [None, 1]},
+            {1: "non-str key", "nested": {2: [3]}},
+            {"floats": [0.1, -0.0, 123456789.125, 1.5e-3, 1.0, 3.0e2]},
+            {"floats": [1e-7, 1e-5, 2.5e-5, 1e16, 1.5e17, 1.7976931348623157e308]},
+            {"file": File(id="1", custom_id=None, key="k", name="n", status="s")},
+            {"private": Private(_secret=1, tags=["a"])},
+            {"size": Size.SMALL, "big": 2**70},
+        ],
+    )
+    def test_matches_legacy_encoder(self, payload):
+        assert json_stringify(payload) == legacy_json_stringify(payload)
+
+    @pytest.mark.parametrize("value", [math.nan, math.inf, -math.inf])
+    def test_rejects_non_finite_floats(self, value):
+        with pytest.raises(ValueError):
+            json_stringify({"metadata": {"score": [1, value]}})
+
+
+class TestRunCallback:
+    @pytest.mark.asyncio
+    async def test_awaits_coroutine_functions(self):
+        async def callback(file, metadata):
+            return {"file": file, **metadata}
+
+        result = await run_callback(callback, file="a", metadata={"userId": 1})
+        assert result == {"file": "a", "userId": 1}
+
+    @pytest.mark.asyncio
+    async def test_runs_sync_callbacks_off_the_event_loop(self):
+        result = await run_callback(lambda: threading.current_thread())
+        assert result is not threading.main_thread()
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        with pytest.raises(TimeoutError):
+            await run_callback(time.sleep, 0.2, timeout=0.01)
+        with pytest.raises(TimeoutError):
+            await run_callback(asyncio.sleep, 0.2, timeout=0.01)
+
+    @pytest.mark.asyncio
+    async def test_sync_callbacks_see_context_variables(self):
+        request_id = contextvars.ContextVar("request_id")
+        request_id.set("req-1")
+        with ThreadPoolExecutor(1) as executor:
+            result = await run_callback(request_id.get, executor=executor)
+        assert result == "req-1"
+
+
+class TestPayloadSigner:
+    def test_matches_sign_payload(self):
+        signer = PayloadSigner("sk_test")
+        payload = b'{"status":"uploaded"}'
+        assert signer.sign(payload) == sign_payload(payload.decode(), "sk_test")
+        assert signer.verify(memoryview(payload), signer.sign(payload))
+        assert verify_signature(payload, signer.sign(payload), "sk_test")
+
+    def test_rejects_bad_signatures(self):
+        signer = PayloadSigner("sk_test")
+        payload = b'{"status":"uploaded"}'
+        assert not signer.verify(payload, None)
+        assert not signer.verify(payload, "hmac-sha256=")
+        assert not signer.verify(payload, PayloadSigner("sk_other").sign(payload))
+
+
+# Built with the algorithm of the JS SDK's generateSignedURL: `expires` in ms is
+# set on the URL, then the URL is signed with HMAC-SHA256 and the hex digest is
+# set as `signature`, prefixed with "hmac-sha256=" (URL-encoded as %3D)
+SIGNED_URL_FIXTURES = [
+    (
+        "https://app123.ufs.sh/f/abc-123.png",
+        3600,
+        "https://app123.ufs.sh/f/abc-123.png?expires=1700003600000"
+        "&signature=hmac-sha256%3D"
+        "dafcee5a330bdf9aadd60d543cc346873e5b51ec43c3d3354f4fb6cef855dbc9",
+    ),
+    (
+        "https://app123.ufs.sh/f/abc-123.png?v=2",
+        60,
+        "https://app123.ufs.sh/f/abc-123.png?v=2&expires=1700000060000"
+        "&signature=hmac-sha256%3D"
+        "7d511d27aa26a4261b6015aa7b840ec5e49d1db648236706632f5a65523eb5db",
+    ),
+]
+
+
+@pytest.mark.parametrize("url, expires_in, expected", SIGNED_URL_FIXTURES)
+def test_generate_signed_url(url, expires_in, expected):
+    signed = generate_signed_url(url, "sk_live_test", expires_in, now=1700000000)
+    assert signed == expected
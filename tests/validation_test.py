@@ -0,0 +1,50 @@
+import pytest
+from uploadthing_py import create_uploadthing
+from uploadthing_py.types import FileUploadData
+from uploadthing_py.validation import parse_file_size
+
+
+def upload(name: str, size: int, type: str) -> FileUploadData:
+    return FileUploadData(name=name, size=size, type=type)
+
+
+class TestParseFileSize:
+    def test_units(self):
+        assert parse_file_size("512B") == 512
+        assert parse_file_size("4MB") == 4 * 1024 * 1024
+        assert parse_file_size("1.5GB") == int(1.5 * 1024**3)
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            parse_file_size("4 parsecs")
+
+
+class TestRouteValidator:
+    def test_accepts_files_within_limits(self):
+        f = create_uploadthing()
+        route = f({"image": {"max_file_size": "4MB", "max_file_count": 2}, "pdf": {}})
+        files = [
+            upload("a.png", 1024, "image/png"),
+            upload("b.jpg", 2048, "image/jpeg"),
+            upload("c.pdf", 10, "application/pdf"),
+        ]
+        assert route.validator.validate(files) == []
+
+    def test_rejects_files_outside_limits(self):
+        f = create_uploadthing()
+        route = f({"image/png": {"max_file_size": "1KB"}})
+        files = [
+            upload("a.png", 2048, "image/png"),
+            upload("b.png", 10, "image/png"),
+            upload("c.mp4", 10, "video/mp4"),
+        ]
+        codes = [error.code for error in route.validator.validate(files)]
+        assert codes == ["TOO_LARGE", "INVALID_FILE_TYPE", "TOO_MANY_FILES"]
+
+    def test_recompiles_after_modification(self):
+        f = create_uploadthing()
+        route = f({"image": {}})
+        video = [upload("a.mp4", 10, "video/mp4")]
+        assert route.validator.validate(video)
+        route({"video": {}})
+        assert route.validator.validate(video) == []
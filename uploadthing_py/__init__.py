@@ -1,7 +1,9 @@
-from uploadthing_py.utapi import UTApi
+from uploadthing_py.utapi import UTApi, SyncUTApi
 from uploadthing_py.types import (
     ACL,
     File,
+    Bulk,
+    UploadFiles,
     DeleteFiles,
     ListFiles,
     RenameFiles,
@@ -10,7 +12,13 @@ from uploadthing_py.types import (
     UpdateACL,
     UploadThingRequestBody,
 )
+from uploadthing_py.retry import RetryPolicy, NO_RETRY
+from uploadthing_py.cache import SignedUrlCache, UsageInfoCache
 from uploadthing_py.request_handler import create_route_handler, extract_router_config
+from uploadthing_py.asgi import create_asgi_app
+from uploadthing_py.instrumentation import Instrumentation
+from uploadthing_py.metrics import ClientMetrics
+from uploadthing_py.sessions import UploadSessionStore
 from uploadthing_py.builder import create_uploadthing
 
 __version__ = "0.1.0"
@@ -19,9 +27,20 @@ __all__ = [
     "create_uploadthing",
     "extract_router_config",
     "create_route_handler",
+    "create_asgi_app",
+    "Instrumentation",
+    "ClientMetrics",
+    "UploadSessionStore",
     "UTApi",
+    "SyncUTApi",
+    "RetryPolicy",
+    "NO_RETRY",
+    "SignedUrlCache",
+    "UsageInfoCache",
     "ACL",
     "File",
+    "Bulk",
+    "UploadFiles",
     "DeleteFiles",
     "ListFiles",
     "RenameFiles",
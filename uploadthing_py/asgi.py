@@ -0,0 +1,195 @@
+import logging
+import typing as t
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from urllib.parse import parse_qsl
+
+from uploadthing_py.builder import UploadThingBuilder
+from uploadthing_py.request_handler import (
+    HandlerResponse,
+    RouteHandlerContext,
+    create_route_context,
+    handle_post,
+)
+from uploadthing_py.utils import json_stringify
+
+logger = logging.getLogger("uploadthing_py")
+
+
+class Headers(dict[str, str]):
+    """Request headers with lowercased names"""
+
+    def __getitem__(self, key: str) -> str:
+        return super().__getitem__(key.lower())
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and super().__contains__(key.lower())
+
+    def get(self, key: str, default=None):
+        return super().get(key.lower(), default)
+
+
+@dataclass(frozen=True)
+class URL:
+    scheme: str
+    netloc: str
+    path: str
+    query: str
+
+
+class ASGIRequest:
+    """
+    A minimal request object built from an ASGI scope. It has the attributes the
+    route handlers (and most middlewares) use: ``method``, ``headers``,
+    ``query_params``, ``url`` and ``body()``.
+    """
+
+    def __init__(self, scope: dict, receive: t.Callable):
+        self.scope = scope
+        self._receive = receive
+        self._body: bytes | None = None
+        self.method: str = scope["method"]
+        self.headers = Headers(
+            (name.decode("latin-1"), value.decode("latin-1"))
+            for name, value in scope["headers"]
+        )
+        query = scope.get("query_string", b"").decode("latin-1")
+        self.query_params = dict(parse_qsl(query))
+
+        path = scope["path"]
+        root_path = scope.get("root_path", "")
+        if root_path and not path.startswith(root_path):
+            path = root_path + path
+        server = scope.get("server")
+        netloc = self.headers.get("host") or (
+            f"{server[0]}:{server[1]}" if server else ""
+        )
+        self.url = URL(
+            scheme=scope.get("scheme", "http"), netloc=netloc, path=path, query=query
+        )
+
+    async def body(self) -> bytes:
+        if self._body is None:
+            chunks = []
+            while True:
+                message = await self._receive()
+                if message["type"] == "http.disconnect":
+                    break
+                chunks.append(message.get("body", b""))
+                if not message.get("more_body", False):
+                    break
+            self._body = b"".join(chunks)
+        return self._body
+
+
+class UploadThingASGIApp:
+    """
+    The route handler as a plain ASGI application, see ``create_asgi_app``.
+    """
+
+    def __init__(self, ctx: RouteHandlerContext):
+        self.ctx = ctx
+
+    async def __call__(self, scope: dict, receive: t.Callable, send: t.Callable):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        request = ASGIRequest(scope, receive)
+        if request.method == "GET":
+            await self._get(request, send)
+        elif request.method == "POST":
+            await self._post(request, send)
+        elif request.method == "OPTIONS":
+            # CORS headers are left to the caller, e.g. CORSMiddleware
+            await _send(send, 204, b"", [(b"allow", b"GET, POST, OPTIONS")])
+        else:
+            await _send(send, 405, b"", [(b"allow", b"GET, POST, OPTIONS")])
+
+    async def close(self, timeout: float | None = 10.0):
+        await self.ctx.aclose(timeout)
+
+    @asynccontextmanager
+    async def lifespan(self, app=None):
+        """Closes the app on shutdown when it is mounted inside another app"""
+        try:
+            yield
+        finally:
+            await self.close()
+
+    async def _get(self, request: ASGIRequest, send: t.Callable):
+        config = self.ctx.router_config.compile()
+        etag = [(b"etag", config.etag.encode())]
+        if config.matches(request.headers.get("if-none-match")):
+            await _send(send, 304, b"", etag)
+        else:
+            await _send(send, 200, config.body, etag + _JSON_HEADERS)
+
+    async def _post(self, request: ASGIRequest, send: t.Callable):
+        response = HandlerResponse()
+        try:
+            content = await handle_post(self.ctx, request, response)
+            body = json_stringify(content)
+        except Exception:
+            logger.exception("Unhandled error in the UploadThing route handler")
+            if response.status_code == 400:
+                body = b'{"error": "Bad request"}'
+            else:
+                response.status_code = 500
+                body = b'{"error": "Internal server error"}'
+        await _send(send, response.status_code, body, _JSON_HEADERS)
+
+    async def _lifespan(self, receive: t.Callable, send: t.Callable):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await self.close()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+
+_JSON_HEADERS = [(b"content-type", b"application/json")]
+
+
+async def _send(send: t.Callable, status: int, body: bytes, headers: list):
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers + [(b"content-length", str(len(body)).encode())],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+def create_asgi_app(
+    router: dict[str, UploadThingBuilder], api_key: str, is_dev: bool, **options
+) -> UploadThingASGIApp:
+    """
+    Create the route handler as an ASGI application, without depending on
+    FastAPI. It serves the router config on GET and uploads and webhooks on POST,
+    and accepts the same options as ``create_route_handler``. Middlewares receive
+    an ``ASGIRequest``.
+
+    Add it to another app as a route rather than with ``mount``, which
+    redirects ``/api/uploadthing`` to ``/api/uploadthing/``. OPTIONS requests
+    get an empty answer, CORS headers are up to the surrounding app.
+
+    ### Example usage:
+    ```py
+    # Standalone, e.g. `uvicorn app:app`
+    app = create_asgi_app(router=upload_router, api_key=api_key, is_dev=False)
+
+    # In FastAPI, or Starlette with `Route("/api/uploadthing", endpoint=ut_app)`
+    ut_app = create_asgi_app(router=upload_router, api_key=api_key, is_dev=False)
+    app = FastAPI(lifespan=ut_app.lifespan)
+    app.add_route("/api/uploadthing", ut_app)
+    ```
+    """
+    return UploadThingASGIApp(
+        create_route_context(router=router, api_key=api_key, is_dev=is_dev, **options)
+    )
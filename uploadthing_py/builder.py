@@ -1,29 +1,60 @@
 from typing import Callable
 
+from uploadthing_py.validation import RouteValidator
+
+
+# The defaults are coroutine functions so they are awaited in place instead of
+# being sent to a thread pool
+async def _default_middleware(req):
+    return None
+
+
+async def _default_on_upload_error(**kwargs):
+    return None
+
+
+async def _default_on_upload_complete(**kwargs):
+    return None
+
 
 class UploadThingBuilder:
     def __init__(self):
+        # Bumped on every modification so compiled route configs can be reused
+        self.version = 0
+        self._validator: tuple[int, RouteValidator] | None = None
         self.config = {}
+        # Callbacks can be regular or coroutine functions
         self.callbacks = {
-            "middleware": lambda req: None,
-            "on_upload_error": lambda req, err: None,
-            "on_upload_complete": lambda req, metadata, file: None,
+            "middleware": _default_middleware,
+            "on_upload_error": _default_on_upload_error,
+            "on_upload_complete": _default_on_upload_complete,
         }
 
     def __call__(self, config):
         self.config.update(config)
+        self.version += 1
         return self
 
+    @property
+    def validator(self) -> RouteValidator:
+        """The route's limits, compiled on first use after each modification"""
+        if self._validator is None or self._validator[0] != self.version:
+            self._validator = (self.version, RouteValidator(self.config))
+        return self._validator[1]
+
     def middleware(self, func: Callable):
         self.callbacks["middleware"] = func
+        self.version += 1
         return self
 
     def on_upload_error(self, func: Callable):
         self.callbacks["on_upload_error"] = func
+        self.version += 1
         return self
 
     def on_upload_complete(self, func: Callable):
         self.callbacks["on_upload_complete"] = func
+        self.version += 1
         return self
 
 
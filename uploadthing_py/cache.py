@@ -0,0 +1,177 @@
+import asyncio
+import dataclasses
+import time
+import typing as t
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlsplit
+
+from uploadthing_py.types import GetUsageInfo
+
+# The API's default lifetime for signed URLs, in seconds
+DEFAULT_SIGNED_URL_EXPIRES_IN = 3600
+
+
+class CacheBackend(t.Protocol):
+    """
+    Storage for cached values with an absolute expiry (a ``time.time()``
+    timestamp). Implement it on top of e.g. Redis to share a cache between
+    workers; ``expires_at`` can be used as the entry's TTL.
+    """
+
+    async def get(self, key: str) -> tuple[str, float] | None: ...
+
+    async def set(self, key: str, value: str, expires_at: float) -> None: ...
+
+
+class MemoryCacheBackend:
+    """An in-process LRU cache that drops expired entries when they are read."""
+
+    def __init__(self, maxsize: int = 1024):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> tuple[str, float] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+
+def url_expiry(url: str) -> float | None:
+    """
+    The expiry of a signed URL as a ``time.time()`` timestamp, read from its
+    ``expires`` query parameter (milliseconds or seconds since the epoch).
+    """
+    value = dict(parse_qsl(urlsplit(url).query)).get("expires")
+    try:
+        expires = float(value)
+    except (TypeError, ValueError):
+        return None
+    return expires / 1000 if expires > 1e11 else expires
+
+
+class SignedUrlCache:
+    """
+    Caches signed URLs by ``(key, key_type, expires_in)`` until ``margin``
+    seconds before they expire, so callers always get a URL that is still valid
+    for a while. Concurrent lookups of the same URL share one API request.
+
+    Args:
+        backend: Where to store URLs, defaults to a ``MemoryCacheBackend``.
+        maxsize: Size of the default in-memory backend.
+        margin: How long before expiry a URL stops being served, in seconds.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend | None = None,
+        maxsize: int = 1024,
+        margin: float = 60.0,
+    ):
+        # Not ``backend or ...``, an empty MemoryCacheBackend is falsy
+        self._backend = MemoryCacheBackend(maxsize) if backend is None else backend
+        self._margin = margin
+        self._in_flight: dict[str, asyncio.Task[str]] = {}
+
+    async def get(
+        self,
+        key: str,
+        key_type: str,
+        expires_in: int | None,
+        fetch: t.Callable[[], t.Awaitable[str]],
+    ) -> str:
+        cache_key = f"{key_type}:{expires_in or ''}:{key}"
+        entry = await self._backend.get(cache_key)
+        if entry is not None and entry[1] - self._margin > time.time():
+            return entry[0]
+
+        task = self._in_flight.get(cache_key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(cache_key, expires_in, fetch))
+            self._in_flight[cache_key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(cache_key, None))
+            task.add_done_callback(_retrieve_exception)
+        # A cancelled caller must not cancel the request other callers wait on
+        return await asyncio.shield(task)
+
+    async def _fetch(
+        self,
+        cache_key: str,
+        expires_in: int | None,
+        fetch: t.Callable[[], t.Awaitable[str]],
+    ) -> str:
+        requested_at = time.time()
+        url = await fetch()
+        expires_at = url_expiry(url) or (
+            requested_at + (expires_in or DEFAULT_SIGNED_URL_EXPIRES_IN)
+        )
+        if expires_at - self._margin > time.time():
+            await self._backend.set(cache_key, url, expires_at)
+        return url
+
+
+class UsageInfoCache:
+    """
+    Keeps the app's usage info for ``ttl`` seconds, and lets concurrent callers
+    share one refresh. Uploads reported with ``record_upload`` are added to the
+    cached totals, so quota checks stay close to the truth between refreshes;
+    each refresh replaces them with the API's numbers.
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self._ttl = ttl
+        self._usage: GetUsageInfo.GetUsageInfoResponse | None = None
+        self._expires_at = 0.0
+        self._in_flight: asyncio.Task[GetUsageInfo.GetUsageInfoResponse] | None = None
+
+    async def get(
+        self, fetch: t.Callable[[], t.Awaitable[GetUsageInfo.GetUsageInfoResponse]]
+    ) -> GetUsageInfo.GetUsageInfoResponse:
+        usage = self._usage
+        if usage is None or time.monotonic() >= self._expires_at:
+            if self._in_flight is None:
+                self._in_flight = asyncio.ensure_future(self._refresh(fetch))
+                self._in_flight.add_done_callback(self._refreshed)
+            usage = await asyncio.shield(self._in_flight)
+        # Copies, so callers can't change the cached totals
+        return dataclasses.replace(usage)
+
+    def record_upload(self, size: int, files: int = 1):
+        if self._usage is not None:
+            self._usage.total_bytes += size
+            self._usage.app_total_bytes += size
+            self._usage.files_uploaded += files
+
+    def invalidate(self):
+        self._usage = None
+
+    async def _refresh(
+        self, fetch: t.Callable[[], t.Awaitable[GetUsageInfo.GetUsageInfoResponse]]
+    ) -> GetUsageInfo.GetUsageInfoResponse:
+        usage = await fetch()
+        self._usage = usage
+        self._expires_at = time.monotonic() + self._ttl
+        return usage
+
+    def _refreshed(self, task: asyncio.Task):
+        self._in_flight = None
+        _retrieve_exception(task)
+
+
+def _retrieve_exception(task: asyncio.Task):
+    # Errors are raised to the callers; don't warn when they have all gone away
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,46 @@
+from httpx import AsyncBaseTransport, AsyncClient, Limits, Timeout
+
+DEFAULT_LIMITS = Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=60.0
+)
+DEFAULT_TIMEOUT = Timeout(10.0, connect=5.0)
+
+
+class SharedClient:
+    """A lazily created, long-lived ``AsyncClient`` that keeps connections alive
+    between requests.
+
+    Args:
+        limits: Connection pool limits, defaults to ``DEFAULT_LIMITS``.
+        timeout: Request timeouts, defaults to ``DEFAULT_TIMEOUT``.
+        http2: Enable HTTP/2. Requires ``httpx[http2]`` to be installed.
+        transport: A custom transport for all requests, e.g. for testing.
+    """
+
+    def __init__(
+        self,
+        limits: Limits | None = None,
+        timeout: Timeout | float | None = None,
+        http2: bool = False,
+        transport: AsyncBaseTransport | None = None,
+    ):
+        self._limits = limits or DEFAULT_LIMITS
+        self._timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+        self._http2 = http2
+        self._transport = transport
+        self._client: AsyncClient | None = None
+
+    def get(self) -> AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = AsyncClient(
+                limits=self._limits,
+                timeout=self._timeout,
+                http2=self._http2,
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
@@ -0,0 +1,128 @@
+import asyncio
+import dataclasses
+import logging
+import typing as t
+from dataclasses import dataclass
+
+from httpx import Response, TransportError
+
+from uploadthing_py.client import SharedClient
+from uploadthing_py.instrumentation import Instrumentation
+from uploadthing_py.retry import RetryPolicy
+
+logger = logging.getLogger("uploadthing_py")
+
+
+def post_server_callback(
+    http: SharedClient,
+    api_key: str,
+    payload: bytes,
+    base_url: str = "https://api.uploadthing.com",
+) -> t.Awaitable[Response]:
+    return http.get().post(
+        f"{base_url}/v6/serverCallback",
+        content=payload,
+        headers={
+            "Content-Type": "application/json",
+            "x-uploadthing-api-key": api_key,
+            "x-uploadthing-version": "6.10.0",
+        },
+    )
+
+
+@dataclass
+class ServerCallbackMetrics:
+    enqueued: int = 0
+    delivered: int = 0
+    failed: int = 0
+    attempts: int = 0
+    pending: int = 0
+
+
+class ServerCallbackQueue:
+    """
+    Delivers serverCallback payloads in the background, so the upload webhook
+    can be acknowledged before the API call is made. At most ``maxsize``
+    payloads are queued, ``put`` waits for room when the queue is full.
+
+    Delivery is retried with ``retry_policy``, like the serverCallback requests
+    sent by the route handler itself.
+    """
+
+    def __init__(
+        self,
+        http: SharedClient,
+        api_key: str,
+        retry_policy: RetryPolicy,
+        maxsize: int = 1000,
+        workers: int = 4,
+        instrumentation: Instrumentation | None = None,
+        base_url: str = "https://api.uploadthing.com",
+    ):
+        self._http = http
+        self._base_url = base_url
+        self._instrumentation = instrumentation or Instrumentation()
+        self._api_key = api_key
+        self._retry_policy = retry_policy
+        self._queue: asyncio.Queue[bytes] = asyncio.Queue(maxsize)
+        self._worker_count = workers
+        self._workers: set[asyncio.Task] = set()
+        self._metrics = ServerCallbackMetrics()
+
+    @property
+    def metrics(self) -> ServerCallbackMetrics:
+        return dataclasses.replace(self._metrics, pending=self._queue.qsize())
+
+    async def put(self, payload: bytes):
+        self._workers = {worker for worker in self._workers if not worker.done()}
+        for _ in range(self._worker_count - len(self._workers)):
+            self._workers.add(asyncio.create_task(self._work()))
+        await self._queue.put(payload)
+        self._metrics.enqueued += 1
+
+    async def drain(self, timeout: float | None = None):
+        """Wait for queued payloads to be delivered, then stop the workers."""
+        try:
+            if self._workers:
+                await asyncio.wait_for(self._queue.join(), timeout)
+        except TimeoutError:
+            logger.warning(
+                "Dropping %d undelivered server callbacks", self._queue.qsize()
+            )
+        finally:
+            workers, self._workers = self._workers, set()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def _work(self):
+        while True:
+            payload = await self._queue.get()
+            try:
+                await self._deliver(payload)
+            except Exception:
+                # Keep the worker alive, the payload is dropped
+                self._metrics.failed += 1
+                logger.exception("Failed to deliver a server callback")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, payload: bytes):
+        def send():
+            self._metrics.attempts += 1
+            return post_server_callback(
+                self._http, self._api_key, payload, self._base_url
+            )
+
+        try:
+            with self._instrumentation.phase("server_callback", deferred=True) as span:
+                response = await self._retry_policy.send("/v6/serverCallback", send)
+                span.status_code = response.status_code
+        except TransportError:
+            self._metrics.failed += 1
+            return
+
+        if response.status_code == 200:
+            self._metrics.delivered += 1
+        else:
+            self._metrics.failed += 1
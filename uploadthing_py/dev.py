@@ -0,0 +1,221 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+
+from httpx import TransportError
+
+from uploadthing_py.client import SharedClient
+from uploadthing_py.instrumentation import Instrumentation
+from uploadthing_py.sessions import UploadSessionStore
+from uploadthing_py.utils import json_stringify, sign_payload
+
+logger = logging.getLogger("uploadthing_py")
+
+
+@dataclass
+class PendingUpload:
+    presigned: dict
+    deadline: float
+    delay: float
+    next_poll: float
+
+
+class DevPoller:
+    """
+    Simulates UploadThing's upload webhook in development, where the API can't
+    reach the local server. One background task polls every pending upload,
+    backing off per upload up to ``max_interval`` and giving up after
+    ``timeout`` seconds, then posts the signed callback to the route handler
+    from a separate task, so slow callbacks don't hold up polling.
+
+    Args:
+        http: The client shared with the route handler.
+        api_key: The API key used to poll and to sign callbacks.
+        interval: Delay before the first poll of an upload, in seconds.
+        max_interval: Upper bound for the delay between polls, in seconds.
+        timeout: How long to wait for an upload to finish, in seconds.
+        concurrency: Maximum number of polls in flight at once.
+        instrumentation: Reports each poll and callback.
+        sessions: The route handler's session store. Uploads it records as
+            called back, by a real webhook racing the poller, are dropped
+            without sending the simulated callback.
+    """
+
+    def __init__(
+        self,
+        http: SharedClient,
+        api_key: str,
+        interval: float = 40e-3,
+        max_interval: float = 2.0,
+        timeout: float = 600.0,
+        concurrency: int = 8,
+        instrumentation: Instrumentation | None = None,
+        sessions: UploadSessionStore | None = None,
+    ):
+        self._http = http
+        self._sessions = sessions
+        self._instrumentation = instrumentation or Instrumentation()
+        self._api_key = api_key
+        self._interval = interval
+        self._max_interval = max_interval
+        self._timeout = timeout
+        self._in_flight = asyncio.Semaphore(concurrency)
+        self._pending: dict[str, PendingUpload] = {}
+        self._task: asyncio.Task | None = None
+        self._callbacks: set[asyncio.Task] = set()
+        # Set by ``track`` to cut the loop's sleep short
+        self._wakeup = asyncio.Event()
+        self._sleep_until = float("inf")
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def track(self, presigned: dict):
+        now = time.monotonic()
+        self._pending[presigned["pollingUrl"]] = PendingUpload(
+            presigned=presigned,
+            deadline=now + self._timeout,
+            delay=self._interval,
+            next_poll=now + self._interval,
+        )
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        elif now + self._interval < self._sleep_until:
+            self._wakeup.set()
+
+    async def aclose(self):
+        task, self._task = self._task, None
+        callbacks, self._callbacks = self._callbacks, set()
+        self._pending.clear()
+        tasks = [*callbacks] if task is None else [task, *callbacks]
+        for pending in tasks:
+            pending.cancel()
+        if tasks:
+            # Waits without raising the tasks' own exceptions, but still lets
+            # the caller be cancelled
+            await asyncio.wait(tasks)
+        if task is not None and not task.cancelled() and task.exception() is not None:
+            logger.error("The dev poller failed", exc_info=task.exception())
+
+    async def _run(self):
+        while self._pending:
+            now = time.monotonic()
+            due = [
+                upload for upload in self._pending.values() if upload.next_poll <= now
+            ]
+            await asyncio.gather(*[self._poll(upload) for upload in due])
+
+            if self._pending:
+                self._sleep_until = min(
+                    upload.next_poll for upload in self._pending.values()
+                )
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        max(0.0, self._sleep_until - time.monotonic()),
+                    )
+                except TimeoutError:
+                    pass
+        self._sleep_until = float("inf")
+
+    async def _poll(self, upload: PendingUpload):
+        presigned = upload.presigned
+        if time.monotonic() > upload.deadline:
+            logger.warning("Polling timed out for %s", presigned["pollingUrl"])
+            self._pending.pop(presigned["pollingUrl"], None)
+            return
+        if await self._called_back(presigned):
+            self._pending.pop(presigned["pollingUrl"], None)
+            return
+
+        # Errors and malformed responses count as "not done yet", so one
+        # upload can't stop the polling of the others
+        polling_data = None
+        try:
+            async with self._in_flight:
+                with self._instrumentation.phase("dev_poll") as span:
+                    response = await self._http.get().get(
+                        presigned["pollingUrl"],
+                        headers={
+                            "Authorization": presigned["pollingJwt"],
+                            "x-uploadthing-api-key": self._api_key,
+                            "x-uploadthing-version": "6.10.0",
+                        },
+                    )
+                    span.status_code = response.status_code
+            if response.is_success:
+                polling_data = response.json()
+        except TransportError:
+            # Already reported by the instrumentation
+            pass
+        except Exception:
+            logger.exception("Failed to poll %s", presigned["pollingUrl"])
+
+        if not isinstance(polling_data, dict) or polling_data.get("status") != "done":
+            upload.delay = min(upload.delay * 2, self._max_interval)
+            upload.next_poll = time.monotonic() + upload.delay
+            return
+
+        self._pending.pop(presigned["pollingUrl"], None)
+        callback = asyncio.create_task(self._run_callback(presigned, polling_data))
+        self._callbacks.add(callback)
+        callback.add_done_callback(self._callbacks.discard)
+
+    async def _called_back(self, presigned: dict) -> bool:
+        if self._sessions is None:
+            return False
+        try:
+            upload = await self._sessions.get_upload(presigned["key"])
+        except Exception:
+            # Keep polling, the callback handler still skips duplicates
+            logger.exception("Failed to look up the upload of %s", presigned["key"])
+            return False
+        return upload is not None and upload["callback"]
+
+    async def _run_callback(self, presigned: dict, polling_data: dict):
+        try:
+            # The upload's webhook may have arrived while it was polled
+            if await self._called_back(presigned):
+                return
+            await self._send_callback(polling_data)
+        except TransportError:
+            pass
+        except Exception:
+            logger.exception("Failed to send the callback for %s", presigned["key"])
+
+    async def _send_callback(self, polling_data: dict):
+        file = polling_data["file"]
+        callback_url = f"{file['callbackUrl']}?slug={file['callbackSlug']}"
+        payload = json_stringify(
+            {
+                "status": "uploaded",
+                "metadata": polling_data["metadata"],
+                "file": {
+                    "url": file["fileUrl"],
+                    "key": file["fileKey"],
+                    "name": file["fileName"],
+                    "size": file["fileSize"],
+                    "custom_id": file["customId"],
+                    "type": file["fileType"],
+                },
+            }
+        )
+
+        signature = sign_payload(payload, self._api_key)
+
+        with self._instrumentation.phase(
+            "dev_callback", file_key=file["fileKey"]
+        ) as span:
+            callback_response = await self._http.get().post(
+                callback_url,
+                content=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "uploadthing-hook": "callback",
+                    "x-uploadthing-signature": signature,
+                },
+            )
+            span.status_code = callback_response.status_code
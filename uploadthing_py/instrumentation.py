@@ -0,0 +1,166 @@
+import logging
+import time
+import typing as t
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+logger = logging.getLogger("uploadthing_py")
+
+
+@dataclass(frozen=True)
+class Event:
+    """
+    One finished phase of the route handler, e.g. ``middleware``,
+    ``prepare_upload``, ``verify_signature``, ``on_upload_complete`` or
+    ``server_callback``. ``duration`` is in seconds, ``status_code`` is set for
+    phases that call the UploadThing API.
+    """
+
+    phase: str
+    duration: float
+    status_code: int | None = None
+    error: Exception | None = None
+    attributes: dict[str, t.Any] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and (
+            self.status_code is None or self.status_code < 400
+        )
+
+    @property
+    def status(self) -> str:
+        """A short label for metrics: the status code, ``ok`` or ``error``."""
+        if self.status_code is not None:
+            return str(self.status_code)
+        return "ok" if self.error is None else "error"
+
+
+type Hook = t.Callable[[Event], None]
+
+
+@dataclass
+class Span:
+    """Lets a phase report its status code before it finishes"""
+
+    phase: str
+    attributes: dict[str, t.Any]
+    status_code: int | None = None
+
+
+class Instrumentation:
+    """
+    Times the phases of the route handler and reports them as ``Event``s: to the
+    ``uploadthing_py`` logger (debug for successes, warning for failures) and to
+    every hook. Hooks are called synchronously on the request path, so they
+    should only record the event.
+
+    ### Example usage:
+    ```py
+    instrumentation = Instrumentation(hooks=[PrometheusHook()])
+    handlers = create_route_handler(..., instrumentation=instrumentation)
+    ```
+    """
+
+    def __init__(self, hooks: t.Iterable[Hook] = ()):
+        self._hooks = list(hooks)
+
+    def add_hook(self, hook: Hook):
+        self._hooks.append(hook)
+
+    @contextmanager
+    def phase(self, name: str, **attributes) -> t.Iterator[Span]:
+        span = Span(name, attributes)
+        started = time.perf_counter()
+        try:
+            yield span
+        except Exception as e:
+            self._finish(span, started, e)
+            raise
+        self._finish(span, started, None)
+
+    def _finish(self, span: Span, started: float, error: Exception | None):
+        duration = time.perf_counter() - started
+        self.emit(Event(span.phase, duration, span.status_code, error, span.attributes))
+
+    def emit(self, event: Event):
+        if event.error is not None:
+            logger.warning(
+                "%s failed after %.1fms: %r %s",
+                event.phase,
+                event.duration * 1000,
+                event.error,
+                event.attributes,
+            )
+        elif not event.ok:
+            logger.warning(
+                "%s returned %d after %.1fms %s",
+                event.phase,
+                event.status_code,
+                event.duration * 1000,
+                event.attributes,
+            )
+        else:
+            logger.debug(
+                "%s finished in %.1fms (%s) %s",
+                event.phase,
+                event.duration * 1000,
+                event.status,
+                event.attributes,
+            )
+
+        for hook in self._hooks:
+            try:
+                hook(event)
+            except Exception:
+                logger.exception("Instrumentation hook %r failed", hook)
+
+
+class PrometheusHook:
+    """
+    Records events in a ``<namespace>_phase_duration_seconds`` histogram labelled
+    by phase and status. Requires ``prometheus_client``.
+    """
+
+    def __init__(self, registry=None, namespace: str = "uploadthing"):
+        try:
+            from prometheus_client import Histogram
+        except ImportError as e:
+            raise ImportError("PrometheusHook requires prometheus_client") from e
+
+        self._duration = Histogram(
+            "phase_duration_seconds",
+            "Duration of the UploadThing route handler phases",
+            ["phase", "status"],
+            namespace=namespace,
+            # prometheus_client uses its default registry unless given one
+            **({"registry": registry} if registry is not None else {}),
+        )
+
+    def __call__(self, event: Event):
+        self._duration.labels(event.phase, event.status).observe(event.duration)
+
+
+class OpenTelemetryHook:
+    """
+    Records events in an ``uploadthing.phase.duration`` histogram with phase and
+    status attributes. Requires ``opentelemetry-api``.
+    """
+
+    def __init__(self, meter=None):
+        try:
+            from opentelemetry import metrics
+        except ImportError as e:
+            raise ImportError("OpenTelemetryHook requires opentelemetry-api") from e
+
+        meter = meter or metrics.get_meter("uploadthing_py")
+        self._duration = meter.create_histogram(
+            "uploadthing.phase.duration",
+            unit="s",
+            description="Duration of the UploadThing route handler phases",
+        )
+
+    def __call__(self, event: Event):
+        self._duration.record(
+            event.duration, {"phase": event.phase, "status": event.status}
+        )
@@ -0,0 +1,158 @@
+import asyncio
+import functools
+import hashlib
+import io
+import json
+import os
+import time
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Presigned upload URLs are valid for an hour, journals are discarded a few
+# minutes earlier so a resumed upload has time to finish
+PRESIGNED_URL_MAX_AGE = 3600.0 - 300.0
+
+# Journal I/O runs in order on one thread, so a part recorded just before its
+# upload is cancelled is still written before the journal can be removed
+_io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="uploadthing-journal")
+
+
+def fingerprint(source: t.Any) -> str | None:
+    """
+    Identify the content of an upload source without reading it where possible:
+    paths and real files by inode, size and modification time, in-memory
+    buffers by their hash. ``None`` for streams that can't be identified without
+    consuming them.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        stat = os.stat(source)
+        return f"file:{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return f"sha256:{hashlib.sha256(source).hexdigest()}"
+    if isinstance(source, io.BytesIO):
+        with source.getbuffer() as buffer:
+            digest = hashlib.sha256(buffer[source.tell() :]).hexdigest()
+        return f"sha256:{digest}"
+    if isinstance(source, io.IOBase) and source.seekable():
+        try:
+            stat = os.fstat(source.fileno())
+        except (OSError, io.UnsupportedOperation):
+            return None
+        return (
+            f"file:{stat.st_dev}:{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+            f":{source.tell()}"
+        )
+    return None
+
+
+class UploadJournal:
+    """
+    Checkpoints a multipart upload to a JSON-lines file so it can be resumed
+    after a crash or restart. The first line holds the presigned upload from
+    ``prepareUpload`` along with the file's fingerprint, every following line
+    one uploaded part and its ETag. Parts are appended as soon as they finish,
+    so a crashed worker only has to re-send the parts that were in flight.
+    File I/O runs in a background thread.
+
+    Journals older than ``max_age`` seconds are discarded, as their presigned
+    URLs have expired, and so are journals of a file whose content changed.
+    The upload of a discarded journal is kept in ``discarded``, so it can be
+    reported as failed.
+    """
+
+    def __init__(
+        self,
+        path: str | os.PathLike,
+        fingerprint: str | None = None,
+        max_age: float = PRESIGNED_URL_MAX_AGE,
+    ):
+        self.path = Path(path)
+        self.fingerprint = fingerprint
+        self.max_age = max_age
+        self.presigned: dict | None = None
+        self.parts: dict[int, str] = {}
+        self.discarded: dict | None = None
+
+    @classmethod
+    def for_file(
+        cls,
+        directory: str | os.PathLike,
+        name: str,
+        size: int,
+        custom_id: str | None = None,
+        fingerprint: str | None = None,
+    ) -> "UploadJournal":
+        """
+        The journal for a file, identified by its name, size and custom id. It
+        is only resumed when ``fingerprint`` matches as well.
+        """
+        digest = hashlib.sha256(json.dumps([name, size, custom_id]).encode())
+        return cls(Path(directory) / f"{digest.hexdigest()[:32]}.jsonl", fingerprint)
+
+    async def load(self, name: str, size: int) -> bool:
+        """
+        Read the journal, returns whether it holds an unfinished, unexpired
+        multipart upload of this file. Expired journals and journals of changed
+        content are removed.
+        """
+        return await self._run(self._load, name, size)
+
+    def _load(self, name: str, size: int) -> bool:
+        self.presigned, self.parts, self.discarded = None, {}, None
+        try:
+            lines = self.path.read_text().splitlines()
+        except FileNotFoundError:
+            return False
+
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # A torn last line from a crash mid-write
+                break
+            if "presigned" in entry:
+                if entry["name"] != name or entry["size"] != size:
+                    return False
+                if (
+                    entry.get("fingerprint") != self.fingerprint
+                    or time.time() - entry.get("prepared_at", 0) > self.max_age
+                ):
+                    self.discarded = entry["presigned"]
+                    self.path.unlink(missing_ok=True)
+                    return False
+                self.presigned = entry["presigned"]
+            elif self.presigned is not None:
+                self.parts[entry["part"]] = entry["etag"]
+        return self.presigned is not None
+
+    async def start(self, presigned: dict, name: str, size: int):
+        self.presigned, self.parts = presigned, {}
+        header = {
+            "name": name,
+            "size": size,
+            "fingerprint": self.fingerprint,
+            "prepared_at": time.time(),
+            "presigned": presigned,
+        }
+        await self._run(self._write, "w", header)
+
+    async def record_part(self, part_number: int, etag: str):
+        self.parts[part_number] = etag
+        await self._run(self._write, "a", {"part": part_number, "etag": etag})
+
+    async def remove(self):
+        await self._run(self.path.unlink, missing_ok=True)
+
+    async def _run(self, func: t.Callable, *args, **kwargs):
+        # Shielded, as cancelling a queued call would drop it from the executor
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args, **kwargs)
+        return await asyncio.shield(loop.run_in_executor(_io, call))
+
+    def _write(self, mode: str, entry: dict[str, t.Any]):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open(mode) as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
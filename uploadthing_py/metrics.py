@@ -0,0 +1,247 @@
+import bisect
+import math
+import threading
+import time
+import typing as t
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from httpx import Response
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    math.inf,
+)
+
+
+class Histogram:
+    """Counts observations in fixed buckets, like a Prometheus histogram."""
+
+    def __init__(self, buckets: t.Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimate the ``q`` quantile by interpolating inside its bucket, the way
+        Prometheus' ``histogram_quantile`` does.
+        """
+        if not self.count:
+            return math.nan
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                if math.isinf(upper):
+                    return lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-2]
+
+
+@dataclass
+class RequestRecord:
+    """One request made by a client, including its retries"""
+
+    path: str
+    bytes_sent: int
+    attempts: int = 0
+    duration: float = 0.0
+    response: Response | None = None
+    error: Exception | None = None
+
+    @property
+    def status_code(self) -> int | None:
+        return self.response.status_code if self.response is not None else None
+
+    @property
+    def bytes_received(self) -> int:
+        return len(self.response.content) if self.response is not None else 0
+
+    def counting(self, send: t.Callable[[], t.Any]) -> t.Callable[[], t.Any]:
+        """Wrap ``send`` to count how often the retry policy calls it"""
+
+        def counted():
+            self.attempts += 1
+            return send()
+
+        return counted
+
+
+class ClientMetrics:
+    """
+    Request metrics of a ``UTApi`` or ``SyncUTApi``: latency histograms, status
+    codes and retries per API path, bytes sent and received, and the number of
+    requests in flight compared to the connection pool size. Presigned uploads
+    are recorded under the ``upload`` path.
+
+    Args:
+        on_request: Called with a ``RequestRecord`` after every request.
+        buckets: Latency histogram buckets, in seconds.
+        max_connections: The connection pool size, set by the client.
+    """
+
+    def __init__(
+        self,
+        on_request: t.Callable[[RequestRecord], None] | None = None,
+        buckets: t.Sequence[float] = LATENCY_BUCKETS,
+        max_connections: int | None = None,
+    ):
+        self.on_request = on_request
+        self.max_connections = max_connections
+        self.latency: defaultdict[str, Histogram] = defaultdict(
+            lambda: Histogram(buckets)
+        )
+        self.statuses: Counter[tuple[str, str]] = Counter()
+        self.retries: Counter[str] = Counter()
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        # SyncUTApi can be shared between threads
+        self._lock = threading.Lock()
+
+    @property
+    def pool_utilisation(self) -> float | None:
+        """Requests in flight as a share of the connection pool, if it is known"""
+        if not self.max_connections:
+            return None
+        return self.in_flight / self.max_connections
+
+    @contextmanager
+    def track(self, path: str, bytes_sent: int) -> t.Iterator[RequestRecord]:
+        record = RequestRecord(path, bytes_sent)
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        started = time.perf_counter()
+        try:
+            yield record
+        except Exception as e:
+            record.error = e
+            raise
+        finally:
+            record.duration = time.perf_counter() - started
+            self._record(record)
+
+    def _record(self, record: RequestRecord):
+        if record.status_code is not None:
+            status = str(record.status_code)
+        else:
+            status = "error" if record.error is not None else "unknown"
+        with self._lock:
+            self.in_flight -= 1
+            self.latency[record.path].observe(record.duration)
+            self.statuses[record.path, status] += 1
+            if record.attempts > 1:
+                self.retries[record.path] += record.attempts - 1
+            self.bytes_sent += record.bytes_sent * max(record.attempts, 1)
+            self.bytes_received += record.bytes_received
+
+        if self.on_request is not None:
+            self.on_request(record)
+
+
+class PrometheusCollector:
+    """
+    Exposes ``ClientMetrics`` to ``prometheus_client``. Values are read from the
+    metrics when the registry is scraped, so nothing is done per request.
+    Requires ``prometheus_client``.
+
+    ### Example usage:
+    ```py
+    utapi = UTApi(api_key)
+    PrometheusCollector(utapi.metrics)
+    ```
+    """
+
+    def __init__(
+        self, metrics: ClientMetrics, registry=None, namespace: str = "uploadthing"
+    ):
+        try:
+            from prometheus_client import REGISTRY
+        except ImportError as e:
+            raise ImportError("PrometheusCollector requires prometheus_client") from e
+
+        self._metrics = metrics
+        self._namespace = namespace
+        (registry or REGISTRY).register(self)
+
+    def collect(self):
+        from prometheus_client.core import (
+            CounterMetricFamily,
+            GaugeMetricFamily,
+            HistogramMetricFamily,
+        )
+
+        metrics, prefix = self._metrics, f"{self._namespace}_client"
+        latency = HistogramMetricFamily(
+            f"{prefix}_request_duration_seconds",
+            "Duration of UploadThing API requests, including retries",
+            labels=["path"],
+        )
+        for path, histogram in list(metrics.latency.items()):
+            cumulative, buckets = 0, []
+            for bound, count in zip(histogram.buckets, histogram.counts):
+                cumulative += count
+                buckets.append(
+                    ("+Inf" if math.isinf(bound) else str(bound), cumulative)
+                )
+            latency.add_metric([path], buckets, histogram.sum)
+        yield latency
+
+        responses = CounterMetricFamily(
+            f"{prefix}_responses",
+            "UploadThing API responses",
+            labels=["path", "status"],
+        )
+        for (path, status), count in list(metrics.statuses.items()):
+            responses.add_metric([path, status], count)
+        yield responses
+
+        retries = CounterMetricFamily(
+            f"{prefix}_retries", "Retried UploadThing API requests", labels=["path"]
+        )
+        for path, count in list(metrics.retries.items()):
+            retries.add_metric([path], count)
+        yield retries
+
+        yield CounterMetricFamily(
+            f"{prefix}_sent_bytes", "Request bytes sent", value=metrics.bytes_sent
+        )
+        yield CounterMetricFamily(
+            f"{prefix}_received_bytes",
+            "Response bytes received",
+            value=metrics.bytes_received,
+        )
+        yield GaugeMetricFamily(
+            f"{prefix}_in_flight_requests",
+            "Requests in flight",
+            value=metrics.in_flight,
+        )
+        if metrics.pool_utilisation is not None:
+            yield GaugeMetricFamily(
+                f"{prefix}_pool_utilisation",
+                "Requests in flight as a share of the connection pool",
+                value=metrics.pool_utilisation,
+            )
@@ -1,15 +1,34 @@
-from fastapi import Request, Response
-from httpx import AsyncClient
-from uploadthing_py.utils import json_stringify, sign_payload, verify_signature
-from uploadthing_py.builder import UploadThingBuilder
 import asyncio
+import logging
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass, field
+from hashlib import sha256
+from pydantic import ValidationError
+from httpx import AsyncBaseTransport, Limits, Timeout
+from uploadthing_py.client import SharedClient
+from uploadthing_py.delivery import ServerCallbackQueue, post_server_callback
+from uploadthing_py.dev import DevPoller
+from uploadthing_py.instrumentation import Instrumentation
+from uploadthing_py.retry import RetryPolicy
+from uploadthing_py.sessions import UploadSessionStore
+from uploadthing_py.utils import PayloadSigner, json_stringify, run_callback
+from uploadthing_py.builder import UploadThingBuilder
 from uploadthing_py.types import (
     UploadRequest,
     CallbackRequest,
     CompleteMPURequest,
     FailureRequest,
+    parse_request_body,
 )
-from typing import Union
+from typing import TYPE_CHECKING, Any, Callable, Union
+
+if TYPE_CHECKING:
+    # Only used for annotations, the handlers work with any request object that
+    # has ``headers``, ``query_params``, ``url`` and ``body()``
+    from fastapi import Request, Response
+
+logger = logging.getLogger("uploadthing_py")
 
 
 def extract_router_config(router: dict[str, UploadThingBuilder]):
@@ -44,71 +63,110 @@ def extract_router_config(router: dict[str, UploadThingBuilder]):
     return routes
 
 
-async def dev_hook(presigned: dict, api_key: str):
-    retry_delay = 40e-3
-    async with AsyncClient() as client:
-        while True:
-            response = await client.get(
-                presigned["pollingUrl"],
-                headers={
-                    "Authorization": presigned["pollingJwt"],
-                    "x-uploadthing-api-key": api_key,
-                    "x-uploadthing-version": "6.10.0",
-                },
-            )
-            polling_data = response.json()
-            if polling_data["status"] == "done":
-                print("[DEV_HOOK] Polling done")
-                break
-            await asyncio.sleep(retry_delay)
-            retry_delay *= 2
-
-        file = polling_data["file"]
-        callback_url = f"{file['callbackUrl']}?slug={file['callbackSlug']}"
-        payload = json_stringify(
-            {
-                "status": "uploaded",
-                "metadata": polling_data["metadata"],
-                "file": {
-                    "url": file["fileUrl"],
-                    "key": file["fileKey"],
-                    "name": file["fileName"],
-                    "size": file["fileSize"],
-                    "custom_id": file["customId"],
-                    "type": file["fileType"],
-                },
-            }
-        )
+class CompiledRouterConfig:
+    """
+    The output of ``extract_router_config``, pre-serialized along with its
+    ETag. It is only rebuilt when the router or one of its builders
+    has been modified since the last compile.
+    """
 
-        signature = sign_payload(payload, api_key)
+    def __init__(self, router: dict[str, UploadThingBuilder]):
+        self._router = router
+        self._signature = None
+        self.body = b""
+        self.etag = ""
 
-        callback_response = await client.post(
-            callback_url,
-            content=payload,
-            headers={
-                "Content-Type": "application/json",
-                "uploadthing-hook": "callback",
-                "x-uploadthing-signature": signature,
-            },
+    def _current_signature(self) -> tuple:
+        return tuple(
+            (slug, id(builder), builder.version)
+            for slug, builder in self._router.items()
         )
-        print(
-            "[DEV_HOOK CALLBACK]", callback_response.status_code, callback_response.text
+
+    def compile(self) -> "CompiledRouterConfig":
+        signature = self._current_signature()
+        if signature != self._signature:
+            self.body = json_stringify(extract_router_config(self._router))
+            self.etag = f'"{sha256(self.body).hexdigest()[:32]}"'
+            self._signature = signature
+        return self
+
+    def matches(self, if_none_match: str | None) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        return self.etag in (
+            tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
         )
 
 
+@dataclass
+class HandlerResponse:
+    """Collects the status code set by the handlers outside of a framework"""
+
+    status_code: int = 200
+
+
+@dataclass
+class RouteHandlerContext:
+    """Shared state for the handlers created by ``create_route_handler``"""
+
+    router: dict[str, UploadThingBuilder]
+    router_config: CompiledRouterConfig
+    api_key: str
+    is_dev: bool
+    http: SharedClient
+    signer: PayloadSigner
+    retry_policy: RetryPolicy
+    dev_poller: DevPoller | None = None
+    callback_executor: Executor | None = None
+    callback_timeout: float | None = None
+    server_callbacks: ServerCallbackQueue | None = None
+    instrumentation: Instrumentation = field(default_factory=Instrumentation)
+    base_url: str = "https://api.uploadthing.com"
+    sessions: UploadSessionStore = field(default_factory=UploadSessionStore)
+
+    async def run_callback(self, func: Callable, *args, **kwargs):
+        return await run_callback(
+            func,
+            *args,
+            executor=self.callback_executor,
+            timeout=self.callback_timeout,
+            **kwargs,
+        )
+
+    async def aclose(self, timeout: float | None = 10.0):
+        if self.dev_poller is not None:
+            await self.dev_poller.aclose()
+        if self.server_callbacks is not None:
+            await self.server_callbacks.drain(timeout)
+        await self.http.aclose()
+
+
 async def handle_upload_request(
     uploader: UploadThingBuilder,
-    request: Request,
+    request: "Request",
     body: UploadRequest,
     slug: str,
-    api_key: str,
-    is_dev: bool,
+    ctx: RouteHandlerContext,
+    response: Union["Response", HandlerResponse, None] = None,
 ):
-    # Run middleware to verify permission to upload
+    # Reject files the route doesn't accept before doing any work for them
+    errors = uploader.validator.validate(body.files)
+    if errors:
+        if response is not None:
+            response.status_code = 400
+        return {
+            "error": "Invalid upload request",
+            "details": [asdict(error) for error in errors],
+        }
+
+    # Run middleware to verify permission to upload, errors are reported by
+    # the instrumentation
     try:
-        metadata = uploader.callbacks["middleware"](request)
-    except Exception as e:
-        print("Middleware error", e)
+        with ctx.instrumentation.phase("middleware", slug=slug):
+            metadata = await ctx.run_callback(uploader.callbacks["middleware"], request)
+    except Exception:
         return {"error": "Unauthorized"}
 
     callback_url = f"{request.url.scheme}://{request.url.netloc}{request.url.path}"
@@ -136,83 +194,143 @@ async def handle_upload_request(
             "callbackSlug": slug,
         }
     )
-    async with AsyncClient() as client:
-        response = await client.post(
-            "https://api.uploadthing.com/v7/prepareUpload",
-            content=payload,
-            headers={
-                "x-uploadthing-api-key": api_key,
-                "x-uploadthing-be-adapter": "uploadthing.py@",
-                "x-uploadthing-version": "6.10.0",
-                "Content-Type": "application/json",
-            },
+    client = ctx.http.get()
+    with ctx.instrumentation.phase("prepare_upload", slug=slug) as span:
+        api_response = await ctx.retry_policy.send(
+            "/v7/prepareUpload",
+            lambda: client.post(
+                f"{ctx.base_url}/v7/prepareUpload",
+                content=payload,
+                headers={
+                    "x-uploadthing-api-key": ctx.api_key,
+                    "x-uploadthing-be-adapter": "uploadthing.py@",
+                    "x-uploadthing-version": "6.10.0",
+                    "Content-Type": "application/json",
+                },
+            ),
         )
-        print("[PRESIGNEDS]", response.status_code, response.text)
-        if response.status_code != 200:
-            return {"error": "Failed to get presigned URLs"}
-
-        presigned_urls = response.json()["data"]
+        span.status_code = api_response.status_code
+        if api_response.status_code != 200:
+            span.attributes["response"] = api_response.text
+    if api_response.status_code != 200:
+        return {"error": "Failed to get presigned URLs"}
+
+    presigned_urls = api_response.json()["data"]
+    await asyncio.gather(
+        *[ctx.sessions.record_upload(slug, presigned) for presigned in presigned_urls]
+    )
 
-        if is_dev:
-            asyncio.gather(
-                *[dev_hook(presigned, api_key) for presigned in presigned_urls]
-            )
+    if ctx.dev_poller is not None:
+        for presigned in presigned_urls:
+            ctx.dev_poller.track(presigned)
 
-        return presigned_urls
+    return presigned_urls
 
 
 async def handle_callback_request(
-    uploader: UploadThingBuilder, request: Request, body: CallbackRequest, api_key: str
+    uploader: UploadThingBuilder,
+    request: "Request",
+    slug: str,
+    ctx: RouteHandlerContext,
+    response: Union["Response", HandlerResponse, None] = None,
 ):
-    if not verify_signature(
-        (await request.body()).decode("utf-8"),
-        request.headers["x-uploadthing-signature"],
-        api_key,
-    ):
+    # Verify the raw bytes and parse the body from them exactly once
+    raw_body = await request.body()
+    with ctx.instrumentation.phase("verify_signature") as span:
+        valid = ctx.signer.verify(
+            raw_body, request.headers.get("x-uploadthing-signature")
+        )
+        span.attributes["valid"] = valid
+    if not valid:
         return {"error": "Invalid signature"}
 
-    try:
-        server_data = uploader.callbacks["on_upload_complete"](
-            file=body.file, metadata=body.metadata
-        )
-    except Exception as e:
-        print("on_upload_complete error", e)
-        return {"error": "Failed to run complete callback"}
-
-    payload = json_stringify({"fileKey": body.file.key, "callbackData": server_data})
-    async with AsyncClient() as client:
-        response = await client.post(
-            "https://api.uploadthing.com/v6/serverCallback",
-            content=payload,
-            headers={
-                "Content-Type": "application/json",
-                "x-uploadthing-api-key": api_key,
-                "x-uploadthing-version": "6.10.0",
-            },
-        )
-        print("[CALLBACK]", response.status_code, response.text)
+    body: CallbackRequest = parse_request_body(raw_body, "callback", None)
+    file_key = body.file.key
 
-        return {"success": True}
+    # Files presigned by this route handler are only called back on the route
+    # they were presigned for
+    upload = await ctx.sessions.get_upload(file_key)
+    if upload is not None and upload["slug"] != slug:
+        if response is not None:
+            response.status_code = 400
+        return {"error": "Callback for an upload of another uploader"}
+
+    # Webhooks can be delivered more than once, only the first one runs
+    # on_upload_complete. Later ones only send its serverCallback again, if
+    # that hasn't succeeded yet.
+    if await ctx.sessions.claim_callback(file_key):
+        # Lets the dev poller skip the upload, once the real webhook arrived
+        if upload is not None:
+            await ctx.sessions.record_callback(file_key)
+        try:
+            with ctx.instrumentation.phase("on_upload_complete", file_key=file_key):
+                server_data = await ctx.run_callback(
+                    uploader.callbacks["on_upload_complete"],
+                    file=body.file,
+                    metadata=body.metadata,
+                )
+        except Exception:
+            await ctx.sessions.release_callback(file_key)
+            if response is not None:
+                response.status_code = 500
+            return {"error": "Failed to run complete callback"}
+        except BaseException:
+            await ctx.sessions.release_callback(file_key)
+            raise
+        payload = json_stringify({"fileKey": file_key, "callbackData": server_data})
+        await ctx.sessions.store_server_callback(file_key, payload)
+    else:
+        payload = await ctx.sessions.get_server_callback(file_key)
+        if payload is None:
+            logger.debug("Skipping duplicate callback for %s", file_key)
+            return {"success": True}
+        logger.debug("Sending the server callback for %s again", file_key)
+
+    # Failures are answered with an error status, so UploadThing delivers the
+    # webhook again
+    if ctx.server_callbacks is not None:
+        await ctx.server_callbacks.put(payload)
+    else:
+        with ctx.instrumentation.phase("server_callback", file_key=file_key) as span:
+            api_response = await ctx.retry_policy.send(
+                "/v6/serverCallback",
+                lambda: post_server_callback(
+                    ctx.http, ctx.api_key, payload, ctx.base_url
+                ),
+            )
+            span.status_code = api_response.status_code
+        if api_response.status_code != 200:
+            if response is not None:
+                response.status_code = 502
+            return {"error": "Failed to send server callback"}
+
+    await ctx.sessions.server_callback_sent(file_key)
+    return {"success": True}
 
 
-async def handle_complete_mpu_request(body: CompleteMPURequest, api_key: str):
-    async with AsyncClient() as client:
-        response = await client.post(
-            "https://api.uploadthing.com/v6/completeMultipart",
-            content=body.model_dump_json(),
-            headers={
-                "Content-Type": "application/json",
-                "x-uploadthing-api-key": api_key,
-                "x-uploadthing-version": "6.10.0",
-            },
+async def handle_complete_mpu_request(
+    body: CompleteMPURequest, ctx: RouteHandlerContext
+):
+    with ctx.instrumentation.phase("complete_multipart", file_key=body.fileKey) as span:
+        response = await ctx.retry_policy.send(
+            "/v6/completeMultipart",
+            lambda: ctx.http.get().post(
+                f"{ctx.base_url}/v6/completeMultipart",
+                content=body.model_dump_json(),
+                headers={
+                    "Content-Type": "application/json",
+                    "x-uploadthing-api-key": ctx.api_key,
+                    "x-uploadthing-version": "6.10.0",
+                },
+            ),
         )
-        print("[MPU COMPLETE]", response.status_code, response.text)
+        span.status_code = response.status_code
 
-        return {"success": True}
+    return {"success": True}
 
 
 async def handle_failure_request(
-    uploader: UploadThingBuilder, body: FailureRequest, api_key: str
+    uploader: UploadThingBuilder, body: FailureRequest, ctx: RouteHandlerContext
 ):
     payload = json_stringify(
         {
@@ -220,52 +338,237 @@ async def handle_failure_request(
             "uploadId": body.uploadId,
         }
     )
-    async with AsyncClient() as client:
-        response = await client.post(
-            "https://api.uploadthing.com/v6/failureCallback",
-            content=payload,
-            headers={
-                "Content-Type": "application/json",
-                "x-uploadthing-api-key": api_key,
-                "x-uploadthing-version": "6.10.0",
-            },
+    with ctx.instrumentation.phase("failure_callback", file_key=body.fileKey) as span:
+        response = await ctx.retry_policy.send(
+            "/v6/failureCallback",
+            lambda: ctx.http.get().post(
+                f"{ctx.base_url}/v6/failureCallback",
+                content=payload,
+                headers={
+                    "Content-Type": "application/json",
+                    "x-uploadthing-api-key": ctx.api_key,
+                    "x-uploadthing-version": "6.10.0",
+                },
+            ),
         )
-        print("[MPU FAILURE]", response.status_code, response.text)
+        span.status_code = response.status_code
 
     try:
-        uploader.callbacks["on_upload_error"](file_key=body.fileKey)
-    except Exception as e:
-        print("on_upload_error error", e)
+        with ctx.instrumentation.phase("on_upload_error", file_key=body.fileKey):
+            await ctx.run_callback(
+                uploader.callbacks["on_upload_error"], file_key=body.fileKey
+            )
+    except Exception:
         return {"error": "Failed to run error callback"}
 
     return {"success": True}
 
 
+def create_route_context(
+    router: dict[str, UploadThingBuilder],
+    api_key: str,
+    is_dev: bool,
+    limits: Limits | None = None,
+    timeout: Timeout | float | None = None,
+    http2: bool = False,
+    retry_policy: RetryPolicy | None = None,
+    callback_executor: Executor | None = None,
+    callback_timeout: float | None = None,
+    defer_server_callback: bool = False,
+    server_callback_queue_size: int = 1000,
+    instrumentation: Instrumentation | None = None,
+    base_url: str = "https://api.uploadthing.com",
+    transport: AsyncBaseTransport | None = None,
+    session_store: UploadSessionStore | None = None,
+) -> RouteHandlerContext:
+    """
+    Build the state shared by the handlers of one router, see
+    ``create_route_handler`` for the options
+    """
+    ctx = RouteHandlerContext(
+        router=router,
+        router_config=CompiledRouterConfig(router),
+        api_key=api_key,
+        is_dev=is_dev,
+        http=SharedClient(
+            limits=limits, timeout=timeout, http2=http2, transport=transport
+        ),
+        signer=PayloadSigner(api_key or ""),
+        retry_policy=retry_policy or RetryPolicy(),
+        callback_executor=callback_executor,
+        callback_timeout=callback_timeout,
+        instrumentation=instrumentation or Instrumentation(),
+        base_url=base_url,
+        sessions=session_store or UploadSessionStore(),
+    )
+    if is_dev:
+        ctx.dev_poller = DevPoller(
+            http=ctx.http,
+            api_key=api_key,
+            instrumentation=ctx.instrumentation,
+            sessions=ctx.sessions,
+        )
+    if defer_server_callback:
+        ctx.server_callbacks = ServerCallbackQueue(
+            http=ctx.http,
+            api_key=api_key,
+            retry_policy=ctx.retry_policy,
+            maxsize=server_callback_queue_size,
+            instrumentation=ctx.instrumentation,
+            base_url=base_url,
+        )
+    return ctx
+
+
+async def handle_post(
+    ctx: RouteHandlerContext,
+    request: "Request",
+    response: Union["Response", HandlerResponse],
+    body: Any = None,
+):
+    """
+    Dispatch a POST to the route handler on its slug, ``actionType`` and
+    ``uploadthing-hook``. The request body is only decoded once the action is
+    known, unless an already parsed ``body`` of the right model is passed.
+    """
+    if not ctx.api_key:
+        response.status_code = 500
+        return {"error": "No API key provided"}
+
+    if "slug" not in request.query_params:
+        response.status_code = 400
+        return {"error": "Missing slug parameter"}
+    slug = request.query_params["slug"]
+
+    if slug not in ctx.router:
+        response.status_code = 404
+        return {"error": "Unknown uploader"}
+    uploader = ctx.router[slug]
+
+    action_type = (
+        request.query_params["actionType"]
+        if "actionType" in request.query_params
+        else None
+    )
+    uploadthing_hook = (
+        request.headers["uploadthing-hook"]
+        if "uploadthing-hook" in request.headers
+        else None
+    )
+
+    async def parse_body(model: type):
+        # Bodies already parsed by the framework are reused, otherwise the
+        # raw body is decoded into the one model the action expects
+        if isinstance(body, model):
+            return body
+        return parse_request_body(await request.body(), uploadthing_hook, action_type)
+
+    try:
+        match [uploadthing_hook, action_type]:
+            case ["callback", None]:
+                return await handle_callback_request(
+                    uploader=uploader,
+                    request=request,
+                    slug=slug,
+                    ctx=ctx,
+                    response=response,
+                )
+            case [None, "upload"]:
+                return await handle_upload_request(
+                    uploader=uploader,
+                    request=request,
+                    body=await parse_body(UploadRequest),
+                    slug=slug,
+                    ctx=ctx,
+                    response=response,
+                )
+            case [None, "failure"]:
+                return await handle_failure_request(
+                    uploader=uploader,
+                    body=await parse_body(FailureRequest),
+                    ctx=ctx,
+                )
+            case [None, "multipart-complete"]:
+                return await handle_complete_mpu_request(
+                    body=await parse_body(CompleteMPURequest), ctx=ctx
+                )
+            case _:
+                response.status_code = 400
+                return {
+                    "error": "Bad request. Invalid hook header or actionType parameter"
+                }
+    except ValidationError as e:
+        # The input is left out, it is the caller's own (possibly binary) body
+        response.status_code = 400
+        return {
+            "error": "Invalid request body",
+            "details": e.errors(
+                include_url=False, include_context=False, include_input=False
+            ),
+        }
+
+
 def create_route_handler(
-    router: dict[str, UploadThingBuilder], api_key: str, is_dev: bool
+    router: dict[str, UploadThingBuilder],
+    api_key: str,
+    is_dev: bool,
+    limits: Limits | None = None,
+    timeout: Timeout | float | None = None,
+    http2: bool = False,
+    retry_policy: RetryPolicy | None = None,
+    callback_executor: Executor | None = None,
+    callback_timeout: float | None = None,
+    defer_server_callback: bool = False,
+    server_callback_queue_size: int = 1000,
+    instrumentation: Instrumentation | None = None,
+    base_url: str = "https://api.uploadthing.com",
+    transport: AsyncBaseTransport | None = None,
+    session_store: UploadSessionStore | None = None,
 ):
     """
     Create request handlers for client side uploads
 
+    All handlers share one keep-alive ``AsyncClient`` which is created on first
+    use. Close it on shutdown with ``handlers["close"]()``, or pass
+    ``handlers["lifespan"]`` to ``FastAPI(lifespan=...)``. Outbound calls to
+    the UploadThing API are retried according to ``retry_policy``.
+
+    Callbacks may be coroutine functions, which are awaited, or regular
+    functions, which run in ``callback_executor`` (the event loop's default
+    executor if not set) so they don't block other requests. Each callback
+    call fails after ``callback_timeout`` seconds.
+
+    With ``defer_server_callback``, upload webhooks are acknowledged as soon as
+    ``on_upload_complete`` returns and the serverCallback request is sent from
+    a background queue holding up to ``server_callback_queue_size`` payloads.
+    ``handlers["server_callback_metrics"]()`` reports its state, and closing
+    the handlers waits for queued payloads to be delivered.
+
+    Each phase (middleware, prepareUpload, signature verification, callbacks
+    and serverCallback) is timed and reported to the ``uploadthing_py``
+    logger and to the hooks of ``instrumentation``.
+
+    ``base_url`` and ``transport`` point the handlers at another API, such as
+    the stand-in in ``uploadthing_py.testing``.
+
+    Presigned files and handled upload callbacks are kept in ``session_store``
+    (in memory by default), so ``on_upload_complete`` runs once per file even
+    when a webhook is delivered again, and the dev poller doesn't call back
+    files the real webhook has reached. A failed ``on_upload_complete`` runs
+    again on the next delivery, a failed serverCallback is only sent again.
+    Pass an ``UploadSessionStore`` with a shared backend when running several
+    workers.
+
     ### Example usage:
     ```py
     from fastapi import FastAPI, Request, Response
     from uploadthing_py import (
         create_uploadthing,
-        UploadThingRequestBody,
         create_route_handler,
     )
     from fastapi.middleware.cors import CORSMiddleware
     import os
 
-    app = FastAPI()
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
-
     f = create_uploadthing()
 
 
@@ -285,6 +588,14 @@ def create_route_handler(
         is_dev=os.getenv("ENVIRONMENT", "development") == "development",
     )
 
+    app = FastAPI(lifespan=handlers["lifespan"])
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
 
     @app.get("/api")
     async def greeting():
@@ -292,81 +603,75 @@ def create_route_handler(
 
 
     @app.get("/api/uploadthing")
-    async def ut_get():
-        return handlers["GET"]()
+    async def ut_get(request: Request):
+        return handlers["GET"](request)
 
 
     @app.post("/api/uploadthing")
-    async def ut_post(
-        request: Request,
-        response: Response,
-        body: UploadThingRequestBody,
-    ):
-        return await handlers["POST"](
-            request=request,
-            response=response,
-            body=body,
-        )
+    async def ut_post(request: Request, response: Response):
+        # The body is parsed by the handler, once it knows which request type it is
+        return await handlers["POST"](request=request, response=response)
     ```
     """
+    from fastapi import Request, Response
+
+    ctx = create_route_context(
+        router=router,
+        api_key=api_key,
+        is_dev=is_dev,
+        limits=limits,
+        timeout=timeout,
+        http2=http2,
+        retry_policy=retry_policy,
+        callback_executor=callback_executor,
+        callback_timeout=callback_timeout,
+        defer_server_callback=defer_server_callback,
+        server_callback_queue_size=server_callback_queue_size,
+        instrumentation=instrumentation,
+        base_url=base_url,
+        transport=transport,
+        session_store=session_store,
+    )
 
-    def ut_get():
-        return extract_router_config(router)
+    def ut_get(request: Request | None = None):
+        config = ctx.router_config.compile()
+        if request is not None and config.matches(request.headers.get("if-none-match")):
+            return Response(status_code=304, headers={"ETag": config.etag})
+
+        return Response(
+            content=config.body,
+            media_type="application/json",
+            headers={"ETag": config.etag},
+        )
 
     async def ut_post(
         request: Request,
         response: Response,
-        body: Union[UploadRequest, CallbackRequest, CompleteMPURequest],
+        body: Union[
+            UploadRequest, CallbackRequest, CompleteMPURequest, FailureRequest, None
+        ] = None,
     ):
-        if not api_key:
-            response.status_code = 500
-            return {"error": "No API key provided"}
-
-        if "slug" not in request.query_params:
-            response.status_code = 400
-            return {"error": "Missing slug parameter"}
-        slug = request.query_params["slug"]
-
-        if slug not in router:
-            response.status_code = 404
-            return {"error": "Unknown uploader"}
-        uploader = router[slug]
-
-        action_type = (
-            request.query_params["actionType"]
-            if "actionType" in request.query_params
-            else None
-        )
-        uploadthing_hook = (
-            request.headers["uploadthing-hook"]
-            if "uploadthing-hook" in request.headers
-            else None
-        )
-
-        match [uploadthing_hook, action_type]:
-            case ["callback", None]:
-                return await handle_callback_request(
-                    uploader=uploader, request=request, body=body, api_key=api_key
-                )
-            case [None, "upload"]:
-                return await handle_upload_request(
-                    uploader=uploader,
-                    request=request,
-                    body=body,
-                    slug=slug,
-                    api_key=api_key,
-                    is_dev=is_dev,
-                )
-            case [None, "failure"]:
-                return await handle_failure_request(
-                    uploader=uploader, body=body, api_key=api_key
-                )
-            case [None, "multipart-complete"]:
-                return await handle_complete_mpu_request(body=body, api_key=api_key)
-            case _:
-                response.status_code = 400
-                return {
-                    "error": "Bad request. Invalid hook header or actionType parameter"
-                }
-
-    return {"GET": ut_get, "POST": ut_post}
+        return await handle_post(ctx, request, response, body)
+
+    def server_callback_metrics():
+        if ctx.server_callbacks is None:
+            return None
+        return ctx.server_callbacks.metrics
+
+    async def close(timeout: float | None = 10.0):
+        await ctx.aclose(timeout)
+
+    @asynccontextmanager
+    async def lifespan(app=None):
+        try:
+            yield
+        finally:
+            await close()
+
+    return {
+        "GET": ut_get,
+        "POST": ut_post,
+        "close": close,
+        "lifespan": lifespan,
+        "server_callback_metrics": server_callback_metrics,
+    }
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import random
+import time
+import typing as t
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from httpx import (
+    ConnectError,
+    ConnectTimeout,
+    PoolTimeout,
+    Response,
+    TransportError,
+)
+
+RETRYABLE_STATUS_CODES = frozenset({408, 429, 500, 502, 503, 504})
+
+# Endpoints that can safely be repeated even if the first attempt may have
+# reached the server
+IDEMPOTENT_PATHS = frozenset(
+    {
+        "/v6/listFiles",
+        "/v6/getUsageInfo",
+        "/v6/requestFileAccess",
+        "/v6/deleteFiles",
+        "/v6/renameFiles",
+        "/v6/updateACL",
+        # Only stores the callback data for a file key
+        "/v6/serverCallback",
+    }
+)
+
+# Failures where the server has certainly not processed the request, so every
+# endpoint can be retried
+_UNSENT_ERRORS = (ConnectError, ConnectTimeout, PoolTimeout)
+_REJECTED_STATUS_CODES = frozenset({429, 503})
+
+logger = logging.getLogger("uploadthing_py")
+
+
+def parse_retry_after(response: Response) -> float | None:
+    """Seconds to wait according to the ``Retry-After`` header, if any."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    When and how to retry requests to the UploadThing API.
+
+    Retries use capped exponential backoff with full jitter, and wait at least
+    as long as the server asks for with ``Retry-After``. Connection failures,
+    429 and 503 are retried for every endpoint, other transient failures only
+    for ``idempotent_paths``. No retry is started that would end after
+    ``deadline`` seconds from the first attempt.
+
+    Args:
+        max_attempts: Maximum number of attempts, including the first one.
+        base_delay: Backoff ceiling for the first retry, in seconds.
+        max_delay: Upper bound for the backoff ceiling, in seconds.
+        deadline: Total time budget for all attempts, in seconds.
+        retry_statuses: Status codes that are considered transient.
+        idempotent_paths: API paths that are safe to repeat.
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 0.2
+    max_delay: float = 10.0
+    deadline: float | None = 30.0
+    retry_statuses: frozenset[int] = RETRYABLE_STATUS_CODES
+    idempotent_paths: frozenset[str] = IDEMPOTENT_PATHS
+
+    def is_retryable(
+        self,
+        path: str,
+        response: Response | None = None,
+        error: Exception | None = None,
+    ) -> bool:
+        if error is not None:
+            if isinstance(error, _UNSENT_ERRORS):
+                return True
+            return isinstance(error, TransportError) and path in self.idempotent_paths
+
+        if response.status_code not in self.retry_statuses:
+            return False
+        return (
+            response.status_code in _REJECTED_STATUS_CODES
+            or path in self.idempotent_paths
+        )
+
+    def backoff(self, attempt: int, response: Response | None = None) -> float:
+        """Delay before retry number ``attempt`` (starting at 1)."""
+        ceiling = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        delay = random.uniform(0, ceiling)
+        retry_after = parse_retry_after(response) if response is not None else None
+        return max(delay, retry_after) if retry_after is not None else delay
+
+    def _next_delay(
+        self,
+        path: str,
+        attempt: int,
+        started: float,
+        response: Response | None,
+        error: Exception | None,
+    ) -> float | None:
+        """The delay before the next attempt, or ``None`` to give up."""
+        if not self.is_retryable(path, response, error) or (
+            attempt >= self.max_attempts
+        ):
+            return None
+
+        delay = self.backoff(attempt, response)
+        if (
+            self.deadline is not None
+            and time.monotonic() - started + delay > self.deadline
+        ):
+            return None
+
+        logger.debug(
+            "Retrying %s in %.3fs (attempt %d): %s",
+            path,
+            delay,
+            attempt,
+            error if error is not None else response.status_code,
+        )
+        return delay
+
+    async def send(
+        self, path: str, send: t.Callable[[], t.Awaitable[Response]]
+    ) -> Response:
+        """
+        Call ``send`` until it returns a non-retryable response or the policy
+        gives up. The last response is returned, the last transport error is
+        raised.
+        """
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            response, error = None, None
+            try:
+                response = await send()
+            except TransportError as e:
+                error = e
+
+            delay = self._next_delay(path, attempt, started, response, error)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+            attempt += 1
+
+        if error is not None:
+            raise error
+        return response
+
+    def send_sync(self, path: str, send: t.Callable[[], Response]) -> Response:
+        """Blocking version of ``send`` for synchronous clients."""
+        started = time.monotonic()
+        attempt = 1
+        while True:
+            response, error = None, None
+            try:
+                response = send()
+            except TransportError as e:
+                error = e
+
+            delay = self._next_delay(path, attempt, started, response, error)
+            if delay is None:
+                break
+            time.sleep(delay)
+            attempt += 1
+
+        if error is not None:
+            raise error
+        return response
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
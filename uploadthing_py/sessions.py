@@ -0,0 +1,165 @@
+import json
+import time
+import typing as t
+from collections import OrderedDict
+
+
+class SessionBackend(t.Protocol):
+    """
+    Key-value storage for upload sessions, modelled on Redis' ``SET`` with
+    ``PX``/``NX``, ``GET`` and ``DEL``. ``set`` returns whether the value was
+    stored, which is ``False`` when ``only_if_absent`` is set and the key exists.
+    """
+
+    async def set(
+        self, key: str, value: bytes, ttl: float, only_if_absent: bool = False
+    ) -> bool: ...
+
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+
+class MemorySessionBackend:
+    """An in-process LRU with per-key expiry, for a single worker."""
+
+    def __init__(self, maxsize: int = 10_000):
+        self._maxsize = maxsize
+        self._entries: OrderedDict[str, tuple[bytes, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def set(
+        self, key: str, value: bytes, ttl: float, only_if_absent: bool = False
+    ) -> bool:
+        if only_if_absent and await self.get(key) is not None:
+            return False
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+        return True
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+
+class RedisSessionBackend:
+    """
+    Shares upload sessions between workers through a ``redis.asyncio`` client
+    (or any client with the same ``set``/``get``/``delete`` signatures).
+    """
+
+    def __init__(self, redis):
+        self._redis = redis
+
+    async def set(
+        self, key: str, value: bytes, ttl: float, only_if_absent: bool = False
+    ) -> bool:
+        stored = await self._redis.set(
+            key, value, px=max(1, int(ttl * 1000)), nx=only_if_absent
+        )
+        return bool(stored)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self._redis.get(key)
+
+    async def delete(self, key: str):
+        await self._redis.delete(key)
+
+
+class UploadSessionStore:
+    """
+    Remembers the files handed out by ``prepareUpload`` and which upload
+    callbacks are being or have been handled, so a redelivered webhook (or the
+    dev poller racing a real callback) runs ``on_upload_complete`` only once.
+    The serverCallback payload built from its result is kept until it is sent,
+    so a redelivery after a failed send only sends it again.
+
+    Args:
+        backend: Where sessions are kept, defaults to a ``MemorySessionBackend``.
+            Use a shared backend such as ``RedisSessionBackend`` when the route
+            handler runs in several processes.
+        ttl: How long uploads and handled callbacks are remembered, in seconds.
+        prefix: Prefix for the backend keys.
+        claim_backend: Where handled callbacks and their unsent
+            serverCallback payloads are kept. Defaults to
+            ``backend``, or a separate ``MemorySessionBackend`` when ``backend``
+            is one, so evicting upload records never evicts a claim early.
+    """
+
+    def __init__(
+        self,
+        backend: SessionBackend | None = None,
+        ttl: float = 3600.0,
+        prefix: str = "uploadthing:",
+        claim_backend: SessionBackend | None = None,
+    ):
+        # Not ``backend or ...``, an empty MemorySessionBackend is falsy
+        self._backend = MemorySessionBackend() if backend is None else backend
+        if claim_backend is None:
+            claim_backend = (
+                MemorySessionBackend()
+                if isinstance(self._backend, MemorySessionBackend)
+                else self._backend
+            )
+        self._claims = claim_backend
+        self._ttl = ttl
+        self._prefix = prefix
+
+    async def record_upload(self, slug: str, presigned: dict):
+        """Remember a file presigned by ``prepareUpload`` for the route ``slug``"""
+        await self._set_upload(
+            presigned["key"],
+            {"slug": slug, "name": presigned.get("fileName"), "callback": False},
+        )
+
+    async def get_upload(self, file_key: str) -> dict | None:
+        """The recorded upload of ``file_key``, ``None`` if it wasn't presigned here"""
+        session = await self._backend.get(f"{self._prefix}upload:{file_key}")
+        return json.loads(session) if session is not None else None
+
+    async def record_callback(self, file_key: str):
+        """Mark the recorded upload of ``file_key`` as called back"""
+        session = await self.get_upload(file_key)
+        if session is not None and not session["callback"]:
+            await self._set_upload(file_key, {**session, "callback": True})
+
+    async def _set_upload(self, file_key: str, session: dict):
+        await self._backend.set(
+            f"{self._prefix}upload:{file_key}", json.dumps(session).encode(), self._ttl
+        )
+
+    async def claim_callback(self, file_key: str) -> bool:
+        """Whether this is the first callback for ``file_key``"""
+        return await self._claims.set(
+            f"{self._prefix}callback:{file_key}", b"1", self._ttl, only_if_absent=True
+        )
+
+    async def release_callback(self, file_key: str):
+        """Let the next delivery of the callback for ``file_key`` run again"""
+        await self._claims.delete(f"{self._prefix}callback:{file_key}")
+
+    async def store_server_callback(self, file_key: str, payload: bytes):
+        """Keep the serverCallback payload for ``file_key`` until it is sent"""
+        await self._claims.set(
+            f"{self._prefix}server-callback:{file_key}", payload, self._ttl
+        )
+
+    async def get_server_callback(self, file_key: str) -> bytes | None:
+        """The unsent serverCallback payload for ``file_key``, if any"""
+        return await self._claims.get(f"{self._prefix}server-callback:{file_key}")
+
+    async def server_callback_sent(self, file_key: str):
+        await self._claims.delete(f"{self._prefix}server-callback:{file_key}")
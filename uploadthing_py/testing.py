@@ -0,0 +1,265 @@
+import asyncio
+import json
+import random
+import time
+import typing as t
+from collections import Counter
+from urllib.parse import quote
+
+from uploadthing_py.asgi import ASGIRequest, _JSON_HEADERS, _send
+from uploadthing_py.utils import json_stringify
+
+
+class MockUploadThingAPI:
+    """
+    An in-memory stand-in for the UploadThing API, for tests and benchmarks
+    without network access. It serves the ``/v6`` endpoints used by ``UTApi``
+    and the route handler, ``/v7/prepareUpload``, the presigned upload URLs it
+    hands out and polling for dev mode. Mount it with ``httpx.ASGITransport``
+    or run it with any ASGI server.
+
+    ### Example usage:
+    ```py
+    api = MockUploadThingAPI(latency=0.02, error_rate=0.05)
+    utapi = UTApi(
+        "sk_test",
+        base_url=api.base_url,
+        transport=httpx.ASGITransport(api),
+    )
+    ```
+
+    Args:
+        base_url: The URL the API is served at, used in presigned URLs.
+        latency: Delay added to every request, in seconds.
+        jitter: Random extra delay of up to ``jitter`` seconds.
+        error_rate: Share of requests (0 to 1) answered with ``error_status``.
+        error_status: Status code of injected errors.
+        chunk_size: Files larger than this get multipart presigned URLs.
+        seed: Seed for the injected latency and errors.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://uploadthing.mock",
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503,
+        chunk_size: int = 5 * 1024**2,
+        seed: int | None = None,
+    ):
+        self.base_url = base_url
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.chunk_size = chunk_size
+        self.files: dict[str, dict] = {}
+        self.requests: Counter[str] = Counter()
+        self._random = random.Random(seed)
+        self._next_key = 0
+        self._routes: dict[str, t.Callable[[dict], dict]] = {
+            "/v7/prepareUpload": self._prepare_upload,
+            "/v6/completeMultipart": self._complete_multipart,
+            "/v6/failureCallback": self._failure_callback,
+            "/v6/serverCallback": self._server_callback,
+            "/v6/listFiles": self._list_files,
+            "/v6/deleteFiles": self._delete_files,
+            "/v6/renameFiles": self._rename_files,
+            "/v6/getUsageInfo": self._get_usage_info,
+            "/v6/requestFileAccess": self._request_file_access,
+            "/v6/updateACL": self._update_acl,
+        }
+
+    async def __call__(self, scope: dict, receive: t.Callable, send: t.Callable):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        request = ASGIRequest(scope, receive)
+        path = request.url.path
+        route = path
+        for prefix in ("/upload/", "/v6/pollUpload/"):
+            if path.startswith(prefix):
+                route = prefix.rstrip("/")
+        self.requests[route] += 1
+
+        delay = self.latency + self._random.uniform(0, self.jitter)
+        if delay:
+            await asyncio.sleep(delay)
+        body = await request.body()
+        if self.error_rate and self._random.random() < self.error_rate:
+            await self._json(send, {"error": "Injected error"}, self.error_status)
+            return
+
+        if request.method == "PUT" and route == "/upload":
+            await self._upload(request, body, send)
+        elif request.method == "GET" and route == "/v6/pollUpload":
+            await self._json(send, self._poll_upload(path.rsplit("/", 1)[1]))
+        elif request.method == "POST" and path in self._routes:
+            await self._json(send, self._routes[path](json.loads(body or b"{}")))
+        else:
+            await self._json(send, {"error": "Not found"}, 404)
+
+    async def _json(self, send: t.Callable, content: dict, status: int = 200):
+        await _send(send, status, json_stringify(content), _JSON_HEADERS)
+
+    def _find(self, update: dict) -> dict | None:
+        if "fileKey" in update:
+            return self.files.get(update["fileKey"])
+        return next(
+            (f for f in self.files.values() if f["customId"] == update["customId"]),
+            None,
+        )
+
+    def _prepare_upload(self, body: dict) -> dict:
+        data = []
+        for file in body["files"]:
+            self._next_key += 1
+            key = f"{self._next_key:08d}-{file['name']}"
+            self.files[key] = {
+                "id": key,
+                "customId": file.get("customId"),
+                "key": key,
+                "name": file["name"],
+                "size": file["size"],
+                "type": file["type"],
+                "status": "Uploading",
+                "metadata": body.get("metadata"),
+                "callbackUrl": body.get("callbackUrl"),
+                "callbackSlug": body.get("callbackSlug"),
+            }
+            presigned = {
+                "key": key,
+                "fileName": file["name"],
+                "fileType": file["type"],
+                "fileUrl": f"{self.base_url}/f/{key}",
+                "customId": file.get("customId"),
+                "contentDisposition": file.get("contentDisposition", "inline"),
+                "pollingUrl": f"{self.base_url}/v6/pollUpload/{quote(key)}",
+                "pollingJwt": "mock-jwt",
+            }
+            upload_url = f"{self.base_url}/upload/{quote(key)}"
+            if file["size"] > self.chunk_size:
+                parts = -(-file["size"] // self.chunk_size)
+                presigned["uploadId"] = f"upload-{key}"
+                presigned["chunkSize"] = self.chunk_size
+                presigned["urls"] = [
+                    f"{upload_url}?partNumber={part}" for part in range(1, parts + 1)
+                ]
+            else:
+                presigned["url"] = upload_url
+            data.append(presigned)
+        return {"data": data}
+
+    async def _upload(self, request: ASGIRequest, body: bytes, send: t.Callable):
+        key = request.url.path.removeprefix("/upload/")
+        file = self.files.get(key)
+        if file is None:
+            await self._json(send, {"error": "Unknown upload"}, 404)
+            return
+        part = request.query_params.get("partNumber")
+        if part is None:
+            file["status"] = "Uploaded"
+        etag = f'"{key}-{part or 1}-{len(body)}"'
+        await _send(send, 200, b"", [(b"etag", etag.encode())])
+
+    def _poll_upload(self, key: str) -> dict:
+        file = self.files.get(key)
+        if file is None or file["status"] != "Uploaded":
+            return {"status": "still working"}
+        return {
+            "status": "done",
+            "metadata": file["metadata"],
+            "file": {
+                "fileKey": key,
+                "fileName": file["name"],
+                "fileSize": file["size"],
+                "fileType": file["type"],
+                "fileUrl": f"{self.base_url}/f/{key}",
+                "customId": file["customId"],
+                "callbackUrl": file["callbackUrl"],
+                "callbackSlug": file["callbackSlug"],
+            },
+        }
+
+    def _complete_multipart(self, body: dict) -> dict:
+        if body["fileKey"] in self.files:
+            self.files[body["fileKey"]]["status"] = "Uploaded"
+        return {"success": True}
+
+    def _failure_callback(self, body: dict) -> dict:
+        self.files.pop(body["fileKey"], None)
+        return {"success": True}
+
+    def _server_callback(self, body: dict) -> dict:
+        if body["fileKey"] in self.files:
+            self.files[body["fileKey"]]["callbackData"] = body.get("callbackData")
+        return {"status": "ok"}
+
+    def _list_files(self, body: dict) -> dict:
+        files = list(self.files.values())
+        offset = body.get("offset") or 0
+        limit = body.get("limit") or 500
+        page = files[offset : offset + limit]
+        return {
+            "hasMore": offset + limit < len(files),
+            "files": [
+                {
+                    "id": file["id"],
+                    "customId": file["customId"],
+                    "key": file["key"],
+                    "name": file["name"],
+                    "status": file["status"],
+                }
+                for file in page
+            ],
+        }
+
+    def _delete_files(self, body: dict) -> dict:
+        updates = [{"fileKey": key} for key in body.get("fileKeys", [])] + [
+            {"customId": custom_id} for custom_id in body.get("customIds", [])
+        ]
+        deleted = 0
+        for update in updates:
+            file = self._find(update)
+            if file is not None:
+                del self.files[file["key"]]
+                deleted += 1
+        return {"success": True, "deletedCount": deleted}
+
+    def _rename_files(self, body: dict) -> dict:
+        for update in body["updates"]:
+            file = self._find(update)
+            if file is not None:
+                file["name"] = update["newName"]
+        return {"success": True}
+
+    def _get_usage_info(self, body: dict) -> dict:
+        uploaded = [f for f in self.files.values() if f["status"] == "Uploaded"]
+        total = sum(file["size"] for file in uploaded)
+        return {
+            "totalBytes": total,
+            "appTotalBytes": total,
+            "filesUploaded": len(uploaded),
+            "limitBytes": 2 * 1024**3,
+        }
+
+    def _request_file_access(self, body: dict) -> dict:
+        key = body.get("fileKey") or body.get("customId")
+        expires = int((time.time() + (body.get("expiresIn") or 3600)) * 1000)
+        return {"url": f"{self.base_url}/f/{quote(key)}?expires={expires}"}
+
+    def _update_acl(self, body: dict) -> dict:
+        for update in body["updates"]:
+            file = self._find(update)
+            if file is not None:
+                file["acl"] = update["acl"]
+        return {"success": True}
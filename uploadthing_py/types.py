@@ -1,6 +1,6 @@
 from typing import Any, Literal, Union, TypedDict
 from dataclasses import dataclass
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 
 type MaybeList[T] = Union[list[T], T]
 
@@ -31,6 +31,55 @@ class File:
         )
 
 
+class UploadFiles:
+    @dataclass
+    class FileEsque:
+        """
+        A file to upload. ``data`` can be a path, an in-memory buffer, a binary
+        file object or an async iterator of bytes. ``size`` is required when it
+        can't be determined from ``data`` (async iterators, unseekable streams).
+        """
+
+        name: str
+        data: Any
+        size: int | None = None
+        type: str | None = None
+        custom_id: str | None = None
+
+    class UploadFileOptions(TypedDict, total=False):
+        metadata: dict[str, Any]
+        content_disposition: Literal["inline", "attachment"]
+        acl: ACL
+        concurrency: int
+        journal_dir: str
+
+    @dataclass
+    class UploadFileResponse:
+        key: str
+        url: str
+        name: str
+        size: int
+        custom_id: str | None = None
+
+
+class Bulk:
+    class BulkOptions(TypedDict, total=False):
+        batch_size: int
+        concurrency: int
+
+    @dataclass
+    class BatchError:
+        batch: int
+        items: list
+        error: Exception
+
+    @dataclass
+    class BulkResponse:
+        success: bool
+        batches: int
+        errors: list["Bulk.BatchError"]
+
+
 class KeyTypeOptions(TypedDict):
     key_type: Literal["custom_id", "file_key"]
 
@@ -54,6 +103,10 @@ class DeleteFiles:
                 success=api_response["success"],
             )
 
+    @dataclass
+    class BulkDeleteFileResponse(Bulk.BulkResponse):
+        deleted_count: int = 0
+
 
 class ListFiles:
     @dataclass
@@ -89,6 +142,10 @@ class RenameFiles:
     class RenameFileResponse:
         success: bool
 
+    @dataclass
+    class BulkRenameFileResponse(Bulk.BulkResponse):
+        pass
+
 
 class GetUsageInfo:
     @dataclass
@@ -122,6 +179,13 @@ class GetSignedUrl:
     class GetSignedUrlResponse:
         url: str
 
+    @dataclass
+    class BulkSignedUrlResponse:
+        """Signed URLs by key in input order, and the errors for failed keys."""
+
+        urls: dict[str, "GetSignedUrl.GetSignedUrlResponse"]
+        errors: dict[str, Exception]
+
 
 class UpdateACL:
     class UpdateACLOptions(KeyTypeOptions):
@@ -131,6 +195,10 @@ class UpdateACL:
     class UpdateACLResponse:
         success: bool
 
+    @dataclass
+    class BulkUpdateACLResponse(Bulk.BulkResponse):
+        pass
+
 
 #
 # Handler Types
@@ -183,3 +251,24 @@ class FailureRequest(BaseModel):
 UploadThingRequestBody = Union[
     UploadRequest, CallbackRequest, CompleteMPURequest, FailureRequest
 ]
+
+# The request body model is determined by the ``uploadthing-hook`` header and
+# the ``actionType`` query parameter, so each body is validated against exactly
+# one model instead of trying every member of ``UploadThingRequestBody``
+REQUEST_BODY_ADAPTERS: dict[tuple[str | None, str | None], TypeAdapter] = {
+    ("callback", None): TypeAdapter(CallbackRequest),
+    (None, "upload"): TypeAdapter(UploadRequest),
+    (None, "failure"): TypeAdapter(FailureRequest),
+    (None, "multipart-complete"): TypeAdapter(CompleteMPURequest),
+}
+
+
+def parse_request_body(
+    raw: bytes | str, uploadthing_hook: str | None, action_type: str | None
+) -> UploadThingRequestBody:
+    """
+    Validate a raw request body against the model for its hook or action type.
+    Raises ``KeyError`` for an unknown combination and ``pydantic.ValidationError``
+    for an invalid body.
+    """
+    return REQUEST_BODY_ADAPTERS[(uploadthing_hook, action_type)].validate_json(raw)
@@ -0,0 +1,119 @@
+import asyncio
+import io
+import os
+import typing as t
+
+type UploadSource = (
+    str
+    | os.PathLike
+    | bytes
+    | bytearray
+    | memoryview
+    | t.BinaryIO
+    | t.AsyncIterable[bytes]
+)
+
+STREAM_CHUNK_SIZE = 1024 * 1024
+
+
+def source_size(source: UploadSource) -> int | None:
+    """
+    Size of an upload source in bytes, or ``None`` if it can't be known without
+    consuming it (async iterators, unseekable streams).
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return memoryview(source).nbytes
+    if isinstance(source, io.IOBase) and source.seekable():
+        position = source.tell()
+        end = source.seek(0, io.SEEK_END)
+        source.seek(position)
+        return end - position
+    return None
+
+
+async def iter_chunks(
+    source: UploadSource, chunk_size: int, offset: int = 0
+) -> t.AsyncIterator[bytes | memoryview]:
+    """
+    Yield ``source`` in chunks of exactly ``chunk_size`` bytes (the last one may
+    be shorter) without reading more than one chunk into memory at a time,
+    starting ``offset`` bytes in. In-memory buffers are sliced without copying,
+    blocking file reads run in a worker thread and seekable files skip to the
+    offset without reading.
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        view = memoryview(source).cast("B")
+        for start in range(offset, view.nbytes, chunk_size):
+            yield view[start : start + chunk_size]
+        return
+
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as file:
+            async for chunk in iter_chunks(file, chunk_size, offset):
+                yield chunk
+        return
+
+    if hasattr(source, "read"):
+        if offset and isinstance(source, io.IOBase) and source.seekable():
+            source.seek(offset, io.SEEK_CUR)
+            offset = 0
+        while offset > 0:
+            skipped = await asyncio.to_thread(
+                _read_full, source, min(offset, chunk_size)
+            )
+            if not skipped:
+                return
+            offset -= len(skipped)
+        while chunk := await asyncio.to_thread(_read_full, source, chunk_size):
+            yield chunk
+        return
+
+    buffer = bytearray()
+    async for piece in source:
+        buffer += piece
+        if offset:
+            skipped = min(offset, len(buffer))
+            del buffer[:skipped]
+            offset -= skipped
+        while len(buffer) >= chunk_size:
+            yield bytes(buffer[:chunk_size])
+            del buffer[:chunk_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def _read_full(source: t.BinaryIO, size: int) -> bytes:
+    """
+    Read ``size`` bytes, fewer only at the end of the stream. Raw and socket
+    streams may return less than requested from a single ``read``.
+    """
+    chunk = source.read(size) or b""
+    if len(chunk) == size or not chunk:
+        return chunk
+    pieces = [chunk]
+    remaining = size - len(chunk)
+    while remaining and (piece := source.read(remaining)):
+        pieces.append(piece)
+        remaining -= len(piece)
+    return b"".join(pieces)
+
+
+async def check_size(
+    chunks: t.AsyncIterator[bytes | memoryview], size: int
+) -> t.AsyncIterator[bytes | memoryview]:
+    """
+    Pass ``chunks`` through, raising ``ValueError`` as soon as they add up to
+    more than ``size`` bytes, or at the end when they add up to less.
+    """
+    total = 0
+    async for chunk in chunks:
+        total += len(chunk)
+        if total > size:
+            raise ValueError(f"Upload source is larger than its size of {size} bytes")
+        yield chunk
+    if total < size:
+        raise ValueError(
+            f"Upload source ended after {total} of its size of {size} bytes"
+        )
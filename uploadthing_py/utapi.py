@@ -1,20 +1,52 @@
 import typing as t
+import asyncio
+import dataclasses
 import logging
-from httpx import AsyncClient, Response
+import mimetypes
+from collections import deque
+from urllib.parse import quote
+from httpx import (
+    AsyncBaseTransport,
+    AsyncClient,
+    BaseTransport,
+    Client,
+    Limits,
+    Response,
+    Timeout,
+)
 
 import uploadthing_py
 from uploadthing_py.types import (
     ACL,
     MaybeList,
     File,
+    Bulk,
+    UploadFiles,
     ListFiles,
     DeleteFiles,
     RenameFiles,
     GetUsageInfo,
     GetSignedUrl,
     UpdateACL,
+    CompleteMPURequest,
+    ETag,
+)
+from uploadthing_py.cache import SignedUrlCache, UsageInfoCache
+from uploadthing_py.client import DEFAULT_LIMITS, DEFAULT_TIMEOUT
+from uploadthing_py.journal import UploadJournal, fingerprint
+from uploadthing_py.metrics import ClientMetrics
+from uploadthing_py.retry import NO_RETRY, RetryPolicy
+from uploadthing_py.upload import (
+    check_size,
+    iter_chunks,
+    source_size,
+    STREAM_CHUNK_SIZE,
 )
-from uploadthing_py.utils import json_stringify, del_none
+from uploadthing_py.utils import json_stringify, del_none, generate_signed_url
+
+
+# How long reporting a failed upload may delay the upload's own error
+FAILURE_CALLBACK_TIMEOUT = 5.0
 
 
 class HttpError(Exception):
@@ -26,13 +58,163 @@ class HttpError(Exception):
         return f"HTTP Error: {self.status_code} {self.message}"
 
 
-class UTApi:
+class _BaseUTApi:
+    """Configuration and request/response handling shared by the API clients"""
+
+    def __init__(
+        self,
+        api_key: str,
+        key_type: t.Literal["file_key", "custom_id"] = "file_key",
+        base_url: str = "https://api.uploadthing.com",
+        retry_policy: RetryPolicy | None = None,
+        app_id: str | None = None,
+        metrics: ClientMetrics | None = None,
+    ):
+        self._api_key = api_key
+        self._app_id = app_id
+        self.metrics = metrics or ClientMetrics()
+        self._headers = {
+            "x-uploadthing-api-key": self._api_key,
+            "x-uploadthing-be-adapter": f"uploadthing_py@{uploadthing_py.__version__}",
+            "x-uploadthing-version": "6.10.0",
+        }
+        self._baseUrl = base_url
+        self._default_key_type = key_type
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._logger = logging.getLogger("uploadthing_py")
+        # Requests go through our own client with the API headers as defaults,
+        # unless a client is passed in, which gets full URLs and headers
+        self._owns_client = True
+        self._path_prefix = ""
+        self._request_headers = {"Content-Type": "application/json"}
+
+    def _use_external_client(self):
+        self._owns_client = False
+        self._path_prefix = self._baseUrl.rstrip("/")
+        self._request_headers = {**self._headers, **self._request_headers}
+
+    def _encode_request(self, path: str, payload: t.Dict | None) -> bytes:
+        stringified = json_stringify(del_none(payload or {}))
+        # Decoding the bodies for the log is only worth it when it is shown
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                "Requesting UploadThing API with: %s %s", path, stringified.decode()
+            )
+        return stringified
+
+    def _decode_response(self, response: Response) -> t.Dict:
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(
+                "UploadThing API returned with: %s %s",
+                response.status_code,
+                response.text,
+            )
+
+        if response.status_code != 200:
+            raise HttpError(response)
+
+        return response.json()
+
+    def generate_signed_url(self, key: str, expires_in: int = 3600) -> str:
+        """
+        Sign a URL for a private file locally, without calling the API. Requires
+        the client to be created with ``app_id``.
+        """
+        if self._app_id is None:
+            raise ValueError("app_id is required to generate signed URLs locally")
+        url = f"https://{self._app_id}.ufs.sh/f/{quote(key)}"
+        return generate_signed_url(url, self._api_key, expires_in)
+
+    def _key_type(self, options: t.Optional[t.Mapping]) -> str:
+        return options["key_type"] if options else self._default_key_type
+
+    def _delete_files_payload(
+        self, keys: MaybeList[str], options: t.Optional[t.Mapping]
+    ) -> t.Dict:
+        if not isinstance(keys, t.List):
+            keys = [keys]
+
+        if self._key_type(options) == "file_key":
+            return {"fileKeys": keys}
+        return {"customIds": keys}
+
+    def _list_files_payload(
+        self, options: ListFiles.ListFilesOptions | t.Mapping | None
+    ) -> t.Dict | None:
+        # Accepts the options dataclass or a plain mapping like {"limit": 5}
+        if not options:
+            return None
+        if dataclasses.is_dataclass(options):
+            return dataclasses.asdict(options)
+        return dict(options)
+
+    def _rename_files_payload(self, updates: RenameFiles.RenameFileOptions) -> t.Dict:
+        if not isinstance(updates, t.List):
+            updates = [updates]
+        self._logger.debug("Rename files: %s", updates)
+
+        updates = [
+            (
+                {
+                    "customId": update["custom_id"],
+                    "newName": update["new_name"],
+                }
+                if "custom_id" in update
+                else {
+                    "fileKey": update["key"],
+                    "newName": update["new_name"],
+                }
+            )
+            for update in updates
+        ]
+        return {"updates": updates}
+
+    def _signed_url_payload(self, key: str, options: t.Optional[t.Mapping]) -> t.Dict:
+        expires_in = options["expires_in"] if options else None
+        if self._key_type(options) == "file_key":
+            return {"fileKey": key, "expiresIn": expires_in}
+        return {"customId": key, "expiresIn": expires_in}
+
+    def _update_acl_payload(
+        self, keys: MaybeList[str], acl: ACL, options: t.Optional[t.Mapping]
+    ) -> t.Dict:
+        if not isinstance(keys, t.List):
+            keys = [keys]
+        key_type = self._key_type(options)
+        updates = [
+            (
+                {"fileKey": key, "acl": acl}
+                if key_type == "file_key"
+                else {"customId": key, "acl": acl}
+            )
+            for key in keys
+        ]
+        return {"updates": updates}
+
+
+class UTApi(_BaseUTApi):
     """An asynchronous client for the UploadThing API.
 
+    Use it as an async context manager, or call ``aclose()`` when done, to
+    release its connections.
+
     Args:
         api_key: The root api key to use for requests.
         key_type: Set the default key type for file operations.
         base_url: The base URL for the UploadThing API.
+        retry_policy: How to retry transient failures, ``NO_RETRY`` disables it.
+        app_id: Your app's ID, needed for ``generate_signed_url``.
+        metrics: Where to record request metrics, see ``ClientMetrics``.
+        limits: Connection pool limits, defaults to ``DEFAULT_LIMITS``.
+        timeout: Request timeouts, defaults to ``DEFAULT_TIMEOUT``.
+        http2: Enable HTTP/2. Requires ``httpx[http2]`` to be installed.
+        transport: A custom transport for all requests, e.g. for testing.
+        client: An existing client to use instead of creating one. It is not
+            closed by ``aclose()``.
+        signed_url_cache: Reuse signed URLs from ``get_signed_url`` until
+            shortly before they expire.
+        usage_info_cache: Serve ``get_usage_info`` from a short-lived cache,
+            updated locally with ``record_upload``.
     """
 
     def __init__(
@@ -40,135 +222,714 @@ class UTApi:
         api_key: str,
         key_type: t.Literal["file_key", "custom_id"] = "file_key",
         base_url: str = "https://api.uploadthing.com",
+        retry_policy: RetryPolicy | None = None,
+        app_id: str | None = None,
+        metrics: ClientMetrics | None = None,
+        limits: Limits | None = None,
+        timeout: Timeout | float | None = None,
+        http2: bool = False,
+        transport: AsyncBaseTransport | None = None,
+        client: AsyncClient | None = None,
+        signed_url_cache: SignedUrlCache | None = None,
+        usage_info_cache: UsageInfoCache | None = None,
     ):
-        self._api_key = api_key
+        super().__init__(api_key, key_type, base_url, retry_policy, app_id, metrics)
+        self._signed_url_cache = signed_url_cache
+        self._usage_info_cache = usage_info_cache
+        if client is not None:
+            self._use_external_client()
+            self._client = self._upload_client = client
+            return
+
+        if self.metrics.max_connections is None:
+            self.metrics.max_connections = (limits or DEFAULT_LIMITS).max_connections
         self._client = AsyncClient(
             base_url=base_url,
-            headers={
-                "x-uploadthing-api-key": self._api_key,
-                "x-uploadthing-be-adapter": f"uploadthing_py@{uploadthing_py.__version__}",
-                "x-uploadthing-version": "6.10.0",
-            },
-        )
-        self._baseUrl = base_url
-        self._default_key_type = key_type
-        self._logger = logging.getLogger("uploadthing_py")
-
-    async def _request_ut_api(self, path: str, payload: t.Dict = None) -> t.Dict:
-        stringified = json_stringify(del_none(payload or {}))
-        self._logger.debug(f"Requesting UploadThing API with: {path} {stringified}")
-        response = await self._client.post(
-            path,
-            content=stringified,
-            headers={"Content-Type": "application/json"},
+            headers=self._headers,
+            limits=limits or DEFAULT_LIMITS,
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+            http2=http2,
+            transport=transport,
         )
-        self._logger.debug(
-            f"UploadThing API returned with: {response.status_code} {response.text}"
+        # Only created by the first upload_files call
+        self._upload_client: AsyncClient | None = None
+        self._upload_client_options = dict(
+            limits=limits or DEFAULT_LIMITS, http2=http2, transport=transport
         )
 
-        if response.status_code != 200:
-            raise HttpError(response)
+    async def __aenter__(self) -> "UTApi":
+        return self
 
-        return response.json()
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        if self._owns_client:
+            await self._client.aclose()
+            if self._upload_client is not None:
+                await self._upload_client.aclose()
+
+    def _get_upload_client(self) -> AsyncClient:
+        # Presigned URLs point at the storage provider, so they get a client
+        # without the API key headers
+        if self._upload_client is None:
+            self._upload_client = AsyncClient(
+                timeout=Timeout(60.0, connect=10.0), **self._upload_client_options
+            )
+        return self._upload_client
+
+    async def _request_ut_api(
+        self,
+        path: str,
+        payload: t.Dict = None,
+        retry_policy: RetryPolicy | None = None,
+    ) -> t.Dict:
+        stringified = self._encode_request(path, payload)
+        with self.metrics.track(path, len(stringified)) as record:
+            record.response = await (retry_policy or self._retry_policy).send(
+                path,
+                record.counting(
+                    lambda: self._client.post(
+                        self._path_prefix + path,
+                        content=stringified,
+                        headers=self._request_headers,
+                    )
+                ),
+            )
+        return self._decode_response(record.response)
 
     async def upload_files(
-        self, files: MaybeList[t.Any], options: t.Optional[t.Any] = None
+        self,
+        files: MaybeList[UploadFiles.FileEsque],
+        options: t.Optional[UploadFiles.UploadFileOptions] = None,
     ):
-        raise NotImplementedError
+        """
+        Upload files from the server. File bodies are streamed from their source,
+        large files are uploaded as multipart chunks with at most
+        ``options["concurrency"]`` (default 4) chunks in flight at once. When a
+        file fails, the uploads of the other files are cancelled and the error
+        is raised. A ``ValueError`` is raised when a source holds more or fewer
+        bytes than its size.
+
+        With ``options["journal_dir"]`` set, the progress of multipart uploads
+        is checkpointed to that directory. Calling ``upload_files`` again with
+        the same file (name, size, custom id and content) after a failure or
+        restart uploads only the missing parts, as long as the presigned URLs
+        are still valid. Failed journaled uploads are only aborted on
+        UploadThing once storage rejects their URLs, or their journal is
+        discarded because it expired or the file changed. Only paths, buffers
+        and files are journaled, streams can't be identified without reading
+        them.
+        """
+        options = options or {}
+        is_list = isinstance(files, t.List)
+        if not is_list:
+            files = [files]
+
+        sizes = [
+            file.size if file.size is not None else source_size(file.data)
+            for file in files
+        ]
+        if any(size is None for size in sizes):
+            raise ValueError("size is required when it can't be read from data")
+
+        journals: list[UploadJournal | None] = [None] * len(files)
+        if "journal_dir" in options:
+            journals = await asyncio.gather(
+                *[
+                    self._open_journal(options["journal_dir"], file, size)
+                    for file, size in zip(files, sizes)
+                ]
+            )
+        presigneds = [journal and journal.presigned for journal in journals]
+
+        # Files resumed from a journal reuse their earlier presigned upload
+        unprepared = [i for i, presigned in enumerate(presigneds) if presigned is None]
+        if unprepared:
+            payload = {
+                "files": [
+                    {
+                        "name": files[i].name,
+                        "size": sizes[i],
+                        "type": files[i].type
+                        or mimetypes.guess_type(files[i].name)[0]
+                        or "application/octet-stream",
+                        "customId": files[i].custom_id,
+                        "contentDisposition": options.get(
+                            "content_disposition", "inline"
+                        ),
+                        **({"acl": options["acl"]} if "acl" in options else {}),
+                    }
+                    for i in unprepared
+                ],
+                "metadata": options.get("metadata"),
+            }
+            api_response = await self._request_ut_api("/v7/prepareUpload", payload)
+            if len(api_response["data"]) != len(unprepared):
+                raise ValueError(
+                    f"prepareUpload returned {len(api_response['data'])} presigned "
+                    f"uploads for {len(unprepared)} files"
+                )
+            for i, presigned in zip(unprepared, api_response["data"]):
+                presigneds[i] = presigned
+                if journals[i] is not None and "urls" in presigned:
+                    await journals[i].start(presigned, files[i].name, sizes[i])
+
+        # One failed file cancels the others, so no upload finishes unreported
+        in_flight = asyncio.Semaphore(options.get("concurrency", 4))
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [
+                    tg.create_task(
+                        self._upload_file(file, size, presigned, in_flight, journal)
+                    )
+                    for file, size, presigned, journal in zip(
+                        files, sizes, presigneds, journals
+                    )
+                ]
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+        responses = [task.result() for task in tasks]
+        self.record_upload(sum(sizes), len(files))
+
+        return responses if is_list else responses[0]
+
+    async def _open_journal(
+        self, directory: str, file: UploadFiles.FileEsque, size: int
+    ) -> UploadJournal | None:
+        content = await asyncio.to_thread(fingerprint, file.data)
+        if content is None:
+            self._logger.warning(
+                "Not journaling the upload of %s, its data can't be fingerprinted",
+                file.name,
+            )
+            return None
+        journal = UploadJournal.for_file(
+            directory, file.name, size, file.custom_id, content
+        )
+        await journal.load(file.name, size)
+        if journal.discarded is not None:
+            # Its multipart upload is left open on UploadThing otherwise
+            await self._report_failed_upload(journal.discarded)
+        return journal
+
+    async def _upload_file(
+        self,
+        file: UploadFiles.FileEsque,
+        size: int,
+        presigned: t.Dict,
+        in_flight: asyncio.Semaphore,
+        journal: UploadJournal | None = None,
+    ) -> UploadFiles.UploadFileResponse:
+        if "urls" in presigned:
+            try:
+                etags = await self._upload_parts(
+                    file.data,
+                    size,
+                    presigned["urls"],
+                    presigned["chunkSize"],
+                    in_flight,
+                    journal,
+                )
+            except (Exception, asyncio.CancelledError) as e:
+                # Abort the upload when it fails or another file failed, unless
+                # it is journaled and kept open so it can be resumed. Storage
+                # rejecting the URLs means they expired and can't be resumed.
+                expired = isinstance(e, HttpError) and e.status_code == 403
+                if journal is not None and expired:
+                    await journal.remove()
+                if journal is None or expired:
+                    await self._report_failed_upload(presigned)
+                raise
+
+            complete = CompleteMPURequest(
+                fileKey=presigned["key"], uploadId=presigned["uploadId"], etags=etags
+            )
+            await self._request_ut_api("/v6/completeMultipart", complete.model_dump())
+            if journal is not None:
+                await journal.remove()
+        else:
+            async with in_flight:
+                with self.metrics.track("upload", size) as record:
+                    record.attempts = 1
+                    record.response = response = await self._get_upload_client().put(
+                        presigned["url"],
+                        content=check_size(
+                            iter_chunks(file.data, STREAM_CHUNK_SIZE), size
+                        ),
+                        headers={"Content-Length": str(size)},
+                    )
+            if not response.is_success:
+                raise HttpError(response)
+
+        return UploadFiles.UploadFileResponse(
+            key=presigned["key"],
+            url=presigned.get("fileUrl", f"https://utfs.io/f/{presigned['key']}"),
+            name=file.name,
+            size=size,
+            custom_id=file.custom_id,
+        )
+
+    async def _report_failed_upload(self, presigned: t.Dict):
+        # Sent once with a short timeout, even while the upload is being
+        # cancelled. Its own failure is only logged, so the caller sees the
+        # error that failed the upload.
+        try:
+            await asyncio.wait_for(
+                self._request_ut_api(
+                    "/v6/failureCallback",
+                    {"fileKey": presigned["key"], "uploadId": presigned["uploadId"]},
+                    retry_policy=NO_RETRY,
+                ),
+                FAILURE_CALLBACK_TIMEOUT,
+            )
+        except Exception:
+            self._logger.warning(
+                "Failed to report the failed upload of %s",
+                presigned["key"],
+                exc_info=True,
+            )
+
+    async def _upload_parts(
+        self,
+        data: t.Any,
+        size: int,
+        urls: list[str],
+        chunk_size: int,
+        in_flight: asyncio.Semaphore,
+        journal: UploadJournal | None = None,
+    ) -> list[ETag]:
+        done = dict(journal.parts) if journal is not None else {}
+        etags = [ETag(tag=tag, partNumber=part) for part, tag in done.items()]
+        missing = [part for part in range(1, len(urls) + 1) if part not in done]
+        if not missing:
+            return sorted(etags, key=lambda etag: etag.partNumber)
+
+        async def upload_part(part_number: int, chunk: bytes | memoryview):
+            try:
+                with self.metrics.track("upload", len(chunk)) as record:
+                    record.attempts = 1
+                    record.response = response = await self._get_upload_client().put(
+                        urls[part_number - 1],
+                        content=_once(chunk),
+                        headers={"Content-Length": str(len(chunk))},
+                    )
+            finally:
+                in_flight.release()
+            if not response.is_success:
+                raise HttpError(response)
+            tag = response.headers["ETag"].replace('"', "")
+            etags.append(ETag(tag=tag, partNumber=part_number))
+            if journal is not None:
+                await journal.record_part(part_number, tag)
+
+        # The semaphore is taken before a chunk is read, so at most
+        # ``concurrency`` chunks are held in memory at any time. Resumed
+        # uploads start reading at the first missing part.
+        try:
+            async with asyncio.TaskGroup() as tg:
+                part_number = missing[0] - 1
+                offset = part_number * chunk_size
+                chunks = check_size(
+                    iter_chunks(data, chunk_size, offset), size - offset
+                )
+                while True:
+                    await in_flight.acquire()
+                    try:
+                        chunk = await anext(chunks, None)
+                    except BaseException:
+                        in_flight.release()
+                        raise
+                    if chunk is None:
+                        in_flight.release()
+                        break
+                    part_number += 1
+                    if part_number in done:
+                        in_flight.release()
+                        continue
+                    tg.create_task(upload_part(part_number, chunk))
+        except ExceptionGroup as e:
+            raise e.exceptions[0]
+
+        return sorted(etags, key=lambda etag: etag.partNumber)
 
     async def delete_files(
         self,
         keys: MaybeList[str],
         options: t.Optional[DeleteFiles.DeleteFileOptions] = None,
     ):
-        if not isinstance(keys, t.List):
-            keys = [keys]
-
-        key_type = options["key_type"] if options else self._default_key_type
-        payload = {"fileKeys": keys} if key_type == "file_key" else {"customIds": keys}
+        payload = self._delete_files_payload(keys, options)
 
         api_response = await self._request_ut_api("/v6/deleteFiles", payload)
         response = DeleteFiles.DeleteFileResponse.from_api_response(api_response)
 
         return response
 
-    async def list_files(self, options: t.Optional[ListFiles.ListFilesOptions] = None):
-        api_response = await self._request_ut_api("/v6/listFiles", options)
+    async def bulk_delete_files(
+        self,
+        keys: list[str],
+        options: t.Optional[DeleteFiles.DeleteFileOptions] = None,
+        bulk_options: t.Optional[Bulk.BulkOptions] = None,
+    ):
+        """
+        Delete any number of files, split into batches that run concurrently.
+        Failed batches are reported in ``errors``, the others still count.
+        """
+        responses, errors = await self._run_batches(
+            keys, lambda batch: self.delete_files(batch, options), bulk_options
+        )
+
+        return DeleteFiles.BulkDeleteFileResponse(
+            success=not errors and all(response.success for response in responses),
+            batches=len(responses) + len(errors),
+            errors=errors,
+            deleted_count=sum(response.deleted_count for response in responses),
+        )
+
+    async def list_files(
+        self, options: ListFiles.ListFilesOptions | t.Mapping | None = None
+    ):
+        api_response = await self._request_ut_api(
+            "/v6/listFiles", self._list_files_payload(options)
+        )
         response = ListFiles.ListFilesResponse(**api_response)
 
         files = [File.from_api_response(file) for file in response.files]
 
         return files
 
+    async def iter_files(
+        self, page_size: int = 500, concurrency: int = 1
+    ) -> t.AsyncIterator[File]:
+        """
+        Iterate over all files in the app, page by page. The next ``concurrency``
+        pages are fetched while the current one is being consumed, so at most
+        ``concurrency + 1`` pages are held in memory.
+
+        ### Example usage:
+        ```py
+        async for file in utapi.iter_files(concurrency=4):
+            print(file.key)
+        ```
+        """
+        pending: deque[asyncio.Task] = deque()
+        next_offset = 0
+
+        def fetch_next_page():
+            nonlocal next_offset
+            payload = {"limit": page_size, "offset": next_offset}
+            pending.append(
+                asyncio.create_task(self._request_ut_api("/v6/listFiles", payload))
+            )
+            next_offset += page_size
+
+        try:
+            for _ in range(concurrency):
+                fetch_next_page()
+
+            while pending:
+                page = ListFiles.ListFilesResponse(**await pending.popleft())
+                if page.hasMore:
+                    fetch_next_page()
+                else:
+                    # Pages past the end were fetched speculatively
+                    while pending:
+                        pending.pop().cancel()
+
+                for file in page.files:
+                    yield File.from_api_response(file)
+        finally:
+            for task in pending:
+                task.cancel()
+
     async def rename_files(self, updates: RenameFiles.RenameFileOptions):
-        if not isinstance(updates, t.List):
-            updates = [updates]
-        self._logger.debug(f"Rename files: {updates}")
+        payload = self._rename_files_payload(updates)
 
-        updates = [
-            (
-                {
-                    "customId": update["custom_id"],
-                    "newName": update["new_name"],
-                }
-                if "custom_id" in update
-                else {
-                    "fileKey": update["key"],
-                    "newName": update["new_name"],
-                }
+        api_response = await self._request_ut_api("/v6/renameFiles", payload)
+        response = RenameFiles.RenameFileResponse(**api_response)
+
+        return response
+
+    async def bulk_rename_files(
+        self,
+        updates: list[t.Union[RenameFiles.KeyRename, RenameFiles.CustomIdRename]],
+        bulk_options: t.Optional[Bulk.BulkOptions] = None,
+    ):
+        responses, errors = await self._run_batches(
+            updates, self.rename_files, bulk_options
+        )
+
+        return RenameFiles.BulkRenameFileResponse(
+            success=not errors and all(response.success for response in responses),
+            batches=len(responses) + len(errors),
+            errors=errors,
+        )
+
+    async def get_usage_info(self):
+        async def fetch() -> GetUsageInfo.GetUsageInfoResponse:
+            api_response = await self._request_ut_api("/v6/getUsageInfo")
+            return GetUsageInfo.GetUsageInfoResponse.from_api_response(api_response)
+
+        if self._usage_info_cache is None:
+            return await fetch()
+        return await self._usage_info_cache.get(fetch)
+
+    def record_upload(self, size: int, files: int = 1):
+        """
+        Add an upload to the cached usage info, e.g. from ``on_upload_complete``.
+        Uploads made with ``upload_files`` are recorded automatically.
+        """
+        if self._usage_info_cache is not None:
+            self._usage_info_cache.record_upload(size, files)
+
+    async def get_signed_url(
+        self, key: str, options: t.Optional[GetSignedUrl.GetSignedUrlOptions] = None
+    ):
+        payload = self._signed_url_payload(key, options)
+
+        async def fetch() -> str:
+            api_response = await self._request_ut_api("/v6/requestFileAccess", payload)
+            return api_response["url"]
+
+        if self._signed_url_cache is None:
+            url = await fetch()
+        else:
+            url = await self._signed_url_cache.get(
+                key, self._key_type(options), payload["expiresIn"], fetch
             )
-            for update in updates
+
+        return GetSignedUrl.GetSignedUrlResponse(url=url)
+
+    async def get_signed_urls(
+        self,
+        keys: t.Iterable[str],
+        options: t.Optional[GetSignedUrl.GetSignedUrlOptions] = None,
+        concurrency: int = 8,
+    ) -> GetSignedUrl.BulkSignedUrlResponse:
+        """
+        Get signed URLs for many files, with at most ``concurrency`` requests in
+        flight. Duplicate keys are requested once, and a failing key doesn't fail
+        the others.
+        """
+        keys = list(dict.fromkeys(keys))
+        in_flight = asyncio.Semaphore(concurrency)
+
+        async def run(key: str):
+            async with in_flight:
+                return await self.get_signed_url(key, options)
+
+        results = await asyncio.gather(
+            *[run(key) for key in keys], return_exceptions=True
+        )
+
+        urls, errors = {}, {}
+        for key, result in zip(keys, results):
+            if isinstance(result, Exception):
+                errors[key] = result
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                urls[key] = result
+        return GetSignedUrl.BulkSignedUrlResponse(urls=urls, errors=errors)
+
+    async def update_acl(
+        self,
+        keys: MaybeList[str],
+        acl: ACL,
+        options: t.Optional[UpdateACL.UpdateACLOptions] = None,
+    ):
+        payload = self._update_acl_payload(keys, acl, options)
+
+        api_response = await self._request_ut_api("/v6/updateACL", payload)
+        response = UpdateACL.UpdateACLResponse(**api_response)
+
+        return response
+
+    async def bulk_update_acl(
+        self,
+        keys: list[str],
+        acl: ACL,
+        options: t.Optional[UpdateACL.UpdateACLOptions] = None,
+        bulk_options: t.Optional[Bulk.BulkOptions] = None,
+    ):
+        responses, errors = await self._run_batches(
+            keys, lambda batch: self.update_acl(batch, acl, options), bulk_options
+        )
+
+        return UpdateACL.BulkUpdateACLResponse(
+            success=not errors and all(response.success for response in responses),
+            batches=len(responses) + len(errors),
+            errors=errors,
+        )
+
+    async def _run_batches(
+        self,
+        items: list,
+        operation: t.Callable[[list], t.Awaitable[t.Any]],
+        options: t.Optional[Bulk.BulkOptions] = None,
+    ) -> tuple[list, list[Bulk.BatchError]]:
+        options = options or {}
+        batch_size = options.get("batch_size", 500)
+        in_flight = asyncio.Semaphore(options.get("concurrency", 4))
+        batches = [
+            items[start : start + batch_size]
+            for start in range(0, len(items), batch_size)
         ]
 
-        api_response = await self._request_ut_api(
-            "/v6/renameFiles", {"updates": updates}
+        async def run(batch: list):
+            async with in_flight:
+                return await operation(batch)
+
+        results = await asyncio.gather(
+            *[run(batch) for batch in batches], return_exceptions=True
+        )
+
+        responses, errors = [], []
+        for index, (batch, result) in enumerate(zip(batches, results)):
+            if isinstance(result, Exception):
+                errors.append(Bulk.BatchError(batch=index, items=batch, error=result))
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                responses.append(result)
+        return responses, errors
+
+
+class SyncUTApi(_BaseUTApi):
+    """A synchronous client for the UploadThing API, for workers without an
+    event loop. Connections are pooled and reused across calls, and a single
+    instance can be shared between threads.
+
+    Args:
+        api_key: The root api key to use for requests.
+        key_type: Set the default key type for file operations.
+        base_url: The base URL for the UploadThing API.
+        retry_policy: How to retry transient failures, ``NO_RETRY`` disables it.
+        app_id: Your app's ID, needed for ``generate_signed_url``.
+        metrics: Where to record request metrics, see ``ClientMetrics``.
+        limits: Connection pool limits, defaults to ``DEFAULT_LIMITS``.
+        timeout: Request timeouts, defaults to ``DEFAULT_TIMEOUT``.
+        http2: Enable HTTP/2. Requires ``httpx[http2]`` to be installed.
+        transport: A custom transport for all requests, e.g. for testing.
+        client: An existing client to use instead of creating one. It is not
+            closed by ``close()``.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        key_type: t.Literal["file_key", "custom_id"] = "file_key",
+        base_url: str = "https://api.uploadthing.com",
+        retry_policy: RetryPolicy | None = None,
+        app_id: str | None = None,
+        metrics: ClientMetrics | None = None,
+        limits: Limits | None = None,
+        timeout: Timeout | float | None = None,
+        http2: bool = False,
+        transport: BaseTransport | None = None,
+        client: Client | None = None,
+    ):
+        super().__init__(api_key, key_type, base_url, retry_policy, app_id, metrics)
+        if client is not None:
+            self._use_external_client()
+            self._client = client
+            return
+
+        if self.metrics.max_connections is None:
+            self.metrics.max_connections = (limits or DEFAULT_LIMITS).max_connections
+        self._client = Client(
+            base_url=base_url,
+            headers=self._headers,
+            limits=limits or DEFAULT_LIMITS,
+            timeout=timeout if timeout is not None else DEFAULT_TIMEOUT,
+            http2=http2,
+            transport=transport,
         )
+
+    def __enter__(self) -> "SyncUTApi":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self._owns_client:
+            self._client.close()
+
+    def _request_ut_api(self, path: str, payload: t.Dict = None) -> t.Dict:
+        stringified = self._encode_request(path, payload)
+        with self.metrics.track(path, len(stringified)) as record:
+            record.response = self._retry_policy.send_sync(
+                path,
+                record.counting(
+                    lambda: self._client.post(
+                        self._path_prefix + path,
+                        content=stringified,
+                        headers=self._request_headers,
+                    )
+                ),
+            )
+        return self._decode_response(record.response)
+
+    def delete_files(
+        self,
+        keys: MaybeList[str],
+        options: t.Optional[DeleteFiles.DeleteFileOptions] = None,
+    ):
+        payload = self._delete_files_payload(keys, options)
+
+        api_response = self._request_ut_api("/v6/deleteFiles", payload)
+        response = DeleteFiles.DeleteFileResponse.from_api_response(api_response)
+
+        return response
+
+    def list_files(self, options: ListFiles.ListFilesOptions | t.Mapping | None = None):
+        api_response = self._request_ut_api(
+            "/v6/listFiles", self._list_files_payload(options)
+        )
+        response = ListFiles.ListFilesResponse(**api_response)
+
+        files = [File.from_api_response(file) for file in response.files]
+
+        return files
+
+    def rename_files(self, updates: RenameFiles.RenameFileOptions):
+        payload = self._rename_files_payload(updates)
+
+        api_response = self._request_ut_api("/v6/renameFiles", payload)
         response = RenameFiles.RenameFileResponse(**api_response)
 
         return response
 
-    async def get_usage_info(self):
-        api_response = await self._request_ut_api("/v6/getUsageInfo")
+    def get_usage_info(self):
+        api_response = self._request_ut_api("/v6/getUsageInfo")
         response = GetUsageInfo.GetUsageInfoResponse.from_api_response(api_response)
 
         return response
 
-    async def get_signed_url(
+    def get_signed_url(
         self, key: str, options: t.Optional[GetSignedUrl.GetSignedUrlOptions] = None
     ):
-        expires_in = options["expires_in"] if options else None
-        key_type = options["key_type"] if options else self._default_key_type
-        payload = (
-            {"fileKey": key, "expiresIn": expires_in}
-            if key_type == "file_key"
-            else {"customId": key, "expiresIn": expires_in}
-        )
+        payload = self._signed_url_payload(key, options)
 
-        api_response = await self._request_ut_api("/v6/requestFileAccess", payload)
+        api_response = self._request_ut_api("/v6/requestFileAccess", payload)
         response = GetSignedUrl.GetSignedUrlResponse(**api_response)
 
         return response
 
-    async def update_acl(
+    def update_acl(
         self,
         keys: MaybeList[str],
         acl: ACL,
         options: t.Optional[UpdateACL.UpdateACLOptions] = None,
     ):
-        if not isinstance(keys, t.List):
-            keys = [keys]
-        key_type = options["key_type"] if options else self._default_key_type
-        updates = [
-            (
-                {"fileKey": key, "acl": acl}
-                if key_type == "file_key"
-                else {"customId": key, "acl": acl}
-            )
-            for key in keys
-        ]
-        payload = {"updates": updates}
+        payload = self._update_acl_payload(keys, acl, options)
 
-        api_response = await self._request_ut_api("/v6/updateACL", payload)
+        api_response = self._request_ut_api("/v6/updateACL", payload)
         response = UpdateACL.UpdateACLResponse(**api_response)
 
         return response
+
+
+async def _once(chunk: bytes | memoryview) -> t.AsyncIterator[bytes | memoryview]:
+    yield chunk
@@ -1,18 +1,63 @@
+import asyncio
+import contextvars
 import dataclasses
+import functools
+import inspect
 import json
 import typing as t
 import hmac
+import time
+from concurrent.futures import Executor
 from hashlib import sha256
+from urllib.parse import parse_qsl, urlencode, urlsplit
 
 
-def json_stringify(o):
-    class EnhancedJSONEncoder(json.JSONEncoder):
-        def default(self, o):
-            if dataclasses.is_dataclass(o):
-                return dataclasses.asdict(o)
-            return super().default(o)
+def _encode_default(o):
+    # The encoder recurses into the fields itself, no need for a deep asdict()
+    if dataclasses.is_dataclass(o) and not isinstance(o, type):
+        return {field.name: getattr(o, field.name) for field in dataclasses.fields(o)}
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
 
-    return json.dumps(o, cls=EnhancedJSONEncoder, separators=(",", ":"))
+
+_json_encoder = json.JSONEncoder(
+    default=_encode_default, separators=(",", ":"), allow_nan=False
+)
+
+
+def json_stringify(o) -> bytes:
+    """
+    Serialize ``o`` to compact JSON bytes, ready to be sent as a request body
+    and signed as-is. The output is the same as ``json.dumps(o,
+    separators=(",", ":"))``, except that NaN and infinities raise
+    ``ValueError``.
+    """
+    return _json_encoder.encode(o).encode()
+
+
+async def run_callback(
+    func: t.Callable,
+    *args,
+    executor: Executor | None = None,
+    timeout: float | None = None,
+    **kwargs,
+):
+    """
+    Run a user callback without blocking the event loop. Coroutine functions are
+    awaited, regular functions run in ``executor`` (the loop's default executor
+    if ``None``). Raises ``TimeoutError`` if the callback takes longer than
+    ``timeout`` seconds, a sync callback keeps running in its thread.
+    """
+    if inspect.iscoroutinefunction(func):
+        return await asyncio.wait_for(func(*args, **kwargs), timeout)
+
+    # Like asyncio.to_thread, the callback sees the caller's context variables
+    # (request ids, tracing spans)
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    result = await asyncio.wait_for(loop.run_in_executor(executor, call), timeout)
+    if inspect.isawaitable(result):
+        result = await asyncio.wait_for(result, timeout)
+    return result
 
 
 def del_none(d: t.Any):
@@ -31,18 +76,63 @@ def del_none(d: t.Any):
 signature_prefix = "hmac-sha256="
 
 
-def sign_payload(payload: str, secret: str) -> str:
-    signature = hmac.new(secret.encode(), payload.encode(), sha256).hexdigest()
+def sign_payload(payload: str | bytes, secret: str) -> str:
+    if isinstance(payload, str):
+        payload = payload.encode()
+    signature = hmac.new(secret.encode(), payload, sha256).hexdigest()
     return f"{signature_prefix}{signature}"
 
 
-def verify_signature(payload: str, signature: str, secret: str) -> bool:
-    if not signature or not signature.startswith(signature_prefix):
-        return False
+def verify_signature(payload: str | bytes, signature: str, secret: str) -> bool:
+    return PayloadSigner(secret).verify(payload, signature)
+
+
+def _set_query_param(url: str, name: str, value: str) -> str:
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    query = [(k, v) for k, v in query if k != name] + [(name, value)]
+    return parts._replace(query=urlencode(query)).geturl()
+
+
+def generate_signed_url(
+    url: str, secret: str, expires_in: int = 3600, now: float | None = None
+) -> str:
+    """
+    Sign a file URL locally, the way the UploadThing JS SDK does: the expiry in
+    milliseconds since the epoch is set as ``expires``, then the whole URL is
+    signed with ``sign_payload`` and the result is set as ``signature``.
+    """
+    now = time.time() if now is None else now
+    expires = int(now * 1000) + expires_in * 1000
+    url = _set_query_param(url, "expires", str(expires))
+    return _set_query_param(url, "signature", sign_payload(url, secret))
+
+
+class PayloadSigner:
+    """
+    Signs and verifies payloads with HMAC-SHA256. The keyed hash state is built
+    once and copied for each payload, which is hashed as-is without copies.
+    """
+
+    def __init__(self, secret: str):
+        self._hmac = hmac.new(secret.encode(), digestmod=sha256)
+
+    def _digest(self, payload: str | bytes | memoryview) -> str:
+        if isinstance(payload, str):
+            payload = payload.encode()
+        mac = self._hmac.copy()
+        mac.update(payload)
+        return mac.hexdigest()
+
+    def sign(self, payload: str | bytes | memoryview) -> str:
+        return f"{signature_prefix}{self._digest(payload)}"
+
+    def verify(self, payload: str | bytes | memoryview, signature: str | None) -> bool:
+        if not signature or not signature.startswith(signature_prefix):
+            return False
 
-    sig = signature[len(signature_prefix) :]
-    if not sig:
-        return False
+        sig = signature[len(signature_prefix) :]
+        if not sig:
+            return False
 
-    hmac_obj = hmac.new(secret.encode(), payload.encode(), sha256).hexdigest()
-    return hmac.compare_digest(hmac_obj, sig)
+        return hmac.compare_digest(self._digest(payload), sig)
@@ -0,0 +1,137 @@
+import re
+from dataclasses import dataclass
+
+from uploadthing_py.types import FileUploadData
+
+FILE_SIZE_UNITS = {"B": 1, "KB": 1024, "MB": 1024**2, "GB": 1024**3}
+
+# Route config keys that aren't a MIME type or a MIME type family
+FILE_TYPE_ALIASES = {"pdf": "application/pdf"}
+
+_FILE_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(B|KB|MB|GB)\s*$", re.I)
+
+
+def parse_file_size(size: str | int) -> int:
+    """Convert a size such as ``"4MB"`` to bytes."""
+    if isinstance(size, int):
+        return size
+    match = _FILE_SIZE_PATTERN.match(size)
+    if not match:
+        raise ValueError(f"Invalid file size: {size!r}")
+    value, unit = match.groups()
+    return int(float(value) * FILE_SIZE_UNITS[unit.upper()])
+
+
+@dataclass(frozen=True)
+class FileTypeLimits:
+    file_type: str
+    max_file_size: int
+    max_file_count: int
+    min_file_count: int
+
+
+@dataclass(frozen=True)
+class ValidationError:
+    code: str
+    message: str
+    file_type: str | None = None
+    file: str | None = None
+
+
+class RouteValidator:
+    """
+    Checks an upload request against the limits declared in a builder's config,
+    using the same defaults as ``extract_router_config``. Sizes are parsed and
+    file types are indexed once, when the validator is created.
+    """
+
+    def __init__(self, config: dict):
+        self._exact: dict[str, FileTypeLimits] = {}
+        self._families: dict[str, FileTypeLimits] = {}
+        self._blob: FileTypeLimits | None = None
+
+        for file_type, options in config.items():
+            if not isinstance(options, dict):
+                continue
+            limits = FileTypeLimits(
+                file_type=file_type,
+                max_file_size=parse_file_size(options.get("max_file_size", "4MB")),
+                max_file_count=options.get("max_file_count", 1),
+                min_file_count=options.get("min_file_count", 1),
+            )
+            if file_type == "blob":
+                self._blob = limits
+            elif "/" in file_type:
+                self._exact[file_type] = limits
+            elif file_type in FILE_TYPE_ALIASES:
+                self._exact[FILE_TYPE_ALIASES[file_type]] = limits
+            else:
+                self._families[file_type] = limits
+
+    def match(self, mime_type: str) -> FileTypeLimits | None:
+        mime_type = mime_type.split(";", 1)[0].strip().lower()
+        return (
+            self._exact.get(mime_type)
+            or self._families.get(mime_type.split("/", 1)[0])
+            or self._blob
+        )
+
+    def validate(self, files: list[FileUploadData]) -> list[ValidationError]:
+        if not files:
+            return [ValidationError(code="TOO_FEW_FILES", message="No files provided")]
+
+        errors = []
+        counts: dict[str, tuple[FileTypeLimits, int]] = {}
+        for file in files:
+            limits = self.match(file.type)
+            if limits is None:
+                errors.append(
+                    ValidationError(
+                        code="INVALID_FILE_TYPE",
+                        message=f"File type {file.type!r} is not allowed",
+                        file=file.name,
+                    )
+                )
+                continue
+
+            if file.size > limits.max_file_size:
+                errors.append(
+                    ValidationError(
+                        code="TOO_LARGE",
+                        message=(
+                            f"File exceeds the {limits.max_file_size} byte limit "
+                            f"for {limits.file_type}"
+                        ),
+                        file_type=limits.file_type,
+                        file=file.name,
+                    )
+                )
+
+            _, count = counts.get(limits.file_type, (limits, 0))
+            counts[limits.file_type] = (limits, count + 1)
+
+        for limits, count in counts.values():
+            if count > limits.max_file_count:
+                errors.append(
+                    ValidationError(
+                        code="TOO_MANY_FILES",
+                        message=(
+                            f"At most {limits.max_file_count} {limits.file_type} "
+                            f"file(s) allowed, got {count}"
+                        ),
+                        file_type=limits.file_type,
+                    )
+                )
+            elif count < limits.min_file_count:
+                errors.append(
+                    ValidationError(
+                        code="TOO_FEW_FILES",
+                        message=(
+                            f"At least {limits.min_file_count} {limits.file_type} "
+                            f"file(s) required, got {count}"
+                        ),
+                        file_type=limits.file_type,
+                    )
+                )
+
+        return errors